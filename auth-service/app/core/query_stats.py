@@ -0,0 +1,144 @@
+"""
+Учёт SQL-запросов в рамках HTTP-запроса.
+
+Хуки before/after_cursor_execute (app/db/session.py) складывают число запросов
+и время в БД в QueryStats текущего запроса. QueryStatsMiddleware:
+- в режиме DEBUG добавляет заголовок Server-Timing (db;dur=...;desc="N queries");
+- пишет в лог запросы, сделавшие больше QUERY_COUNT_WARN_THRESHOLD обращений
+  к БД или повторившие один и тот же SQL (признак N+1).
+
+Для проверок в тестах: with assert_max_queries(3): client.get(...).
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Сколько запросов сохраняется с текстом и параметрами (для отладки и EXPLAIN)
+MAX_RECORDED_QUERIES = 200
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+        self.queries: List[tuple] = []
+
+    def record(self, statement: str, parameters, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        if len(self.queries) < MAX_RECORDED_QUERIES:
+            self.queries.append((statement, parameters, duration))
+
+    def repeated(self, min_count: int = 2) -> List[tuple]:
+        """Одинаковые SQL, выполненные не менее min_count раз"""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= min_count]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Обработанные запросы попадают и сюда, пока работает track_queries()
+_trackers: List[List[QueryStats]] = []
+_trackers_lock = threading.Lock()
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, parameters, time.perf_counter() - started)
+
+
+def handle_error(exception_context):
+    # after_cursor_execute при ошибке не вызывается — снимаем отметку времени здесь
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+
+def _report(scope, stats: QueryStats) -> None:
+    repeated = stats.repeated(settings.QUERY_REPEAT_WARN_THRESHOLD)
+    if stats.count > settings.QUERY_COUNT_WARN_THRESHOLD or repeated:
+        logger.warning(
+            "%s %s: %d SQL queries, %.1f ms in DB%s",
+            scope["method"],
+            scope["path"],
+            stats.count,
+            stats.duration * 1000,
+            "".join(f"\n  possible N+1 ({n}x): {sql}" for sql, n in repeated),
+        )
+    with _trackers_lock:
+        for tracker in _trackers:
+            tracker.append(stats)
+
+
+class QueryStatsMiddleware:
+    """ASGI-middleware: счётчик SQL на каждый HTTP-запрос"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                timing = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode())
+                ]
+            await send(message)
+
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _report(scope, stats)
+
+
+@contextmanager
+def track_queries():
+    """Собирает QueryStats всех HTTP-запросов, обработанных внутри блока"""
+    tracked: List[QueryStats] = []
+    with _trackers_lock:
+        _trackers.append(tracked)
+    try:
+        yield tracked
+    finally:
+        with _trackers_lock:
+            _trackers.remove(tracked)
+
+
+@contextmanager
+def assert_max_queries(max_count: int):
+    """Проверка для тестов: запросы внутри блока сделали не больше max_count SQL"""
+    with track_queries() as tracked:
+        yield tracked
+    total = sum(stats.count for stats in tracked)
+    if total > max_count:
+        statements = "\n".join(
+            f"  {n}x {sql}" for stats in tracked for sql, n in stats.statements.most_common()
+        )
+        raise AssertionError(f"Expected at most {max_count} SQL queries, got {total}:\n{statements}")
@@ -1,14 +1,44 @@
 from fastapi import FastAPI
 from app.api.v1 import auth, users
+from app.core.compression import CompressionMiddleware, parse_content_types
+from app.core.deadline import DeadlineMiddleware
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.tracing import TracingMiddleware
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.config import settings
+from app.db.session import engine
 
 app = FastAPI(title="Auth Service", version="1.0.0")
 
+app.add_middleware(DeadlineMiddleware)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        level=settings.COMPRESSION_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        content_types=parse_content_types(settings.COMPRESSION_TYPES),
+    )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
 
 # Импортируем модели для Alembic (после создания app, чтобы избежать циклических импортов)
 from app.models.user import User  # noqa: F401
 
+@app.on_event("shutdown")
+def close_db_pool():
+    engine.dispose()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
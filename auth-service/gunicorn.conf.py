@@ -0,0 +1,99 @@
+"""
+Production-профиль сервиса: gunicorn с воркерами uvicorn.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+- число воркеров — WEB_CONCURRENCY или число ядер, доступных контейнеру
+  (affinity и квота CPU cgroup);
+- соединения с БД: DB_CONNECTION_BUDGET на весь сервис делится между
+  воркерами (DB_POOL_SIZE и DB_MAX_OVERFLOW каждого воркера), чтобы сумма по
+  сервисам укладывалась в max_connections Postgres (см. docker-compose.prod.yml);
+- приложение импортируется в мастере до fork (preload_app): воркеры
+  стартуют быстро и делят с мастером память под код;
+- воркер перезапускается после GUNICORN_MAX_REQUESTS запросов (с разбросом,
+  чтобы воркеры не уходили на перезапуск одновременно) — рост памяти
+  ограничен;
+- на SIGTERM воркер перестаёт принимать соединения, до GUNICORN_GRACEFUL_TIMEOUT
+  секунд дорабатывает начатые запросы и выполняет shutdown-обработчики
+  приложения (закрывает пул соединений с БД).
+
+/metrics суммирует метрики всех воркеров: воркеры пишут их в каталог
+PROMETHEUS_MULTIPROC_DIR (по умолчанию prometheus-auth рядом с
+heartbeat-файлами), см. app/core/metrics.py.
+"""
+import math
+import os
+import shutil
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8001")
+
+
+def _cpu_count() -> int:
+    """Ядра, доступные процессу: affinity и квота CPU cgroup v2 (docker --cpus)"""
+    count = len(os.sched_getaffinity(0))
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+workers = int(os.getenv("WEB_CONCURRENCY") or _cpu_count())
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Соединения с БД на весь сервис (все воркеры): пул каждого воркера — его доля.
+# Воркеров не больше, чем позволяет бюджет (минимум 2 соединения на воркер);
+# явно заданные DB_POOL_SIZE/DB_MAX_OVERFLOW не переопределяются
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "25"))
+_RESERVED_PER_WORKER = 0
+workers = max(1, min(workers, DB_CONNECTION_BUDGET // (2 + _RESERVED_PER_WORKER)))
+_per_worker = max(2, DB_CONNECTION_BUDGET // workers - _RESERVED_PER_WORKER)
+os.environ.setdefault("DB_POOL_SIZE", str(_per_worker // 2))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(_per_worker - _per_worker // 2))
+
+preload_app = True
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Heartbeat-файлы воркеров — в памяти, а не на overlay-диске контейнера
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Каталог метрик задаётся до импорта приложения (preload_app): prometheus_client
+# читает его при создании метрик
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(worker_tmp_dir or "/tmp", "prometheus-auth")
+)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Соединения, открытые мастером при импорте, не должны использоваться
+    # несколькими процессами: воркер начинает с пустым пулом, а сокеты
+    # мастера не закрывает (close=False)
+    from app.db.session import engine
+
+    engine.dispose(close=False)
+
+
+def on_starting(server):
+    # Файлы метрик прошлого запуска: счётчики начинаются с нуля
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # gauge-метрики (livesum) завершившегося воркера больше не учитываются;
+    # его счётчики и гистограммы остаются в сумме
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарки обработчиков бэкендов через FastAPI TestClient на локальной
+Postgres с данными scripts/seed.py.
+
+Каждый сервис — отдельный процесс (пакеты app одноимённы). Подготовка данных
+и сами вызовы идут в одной транзакции, которая в конце откатывается.
+
+    python benchmarks/backend.py all --save          # снять базовые линии
+    python benchmarks/backend.py leasing --compare   # сравнить, код 1 при регрессии
+    python benchmarks/backend.py property -k ilike --threshold 0.3
+    python benchmarks/backend.py property -k ilike --property-rows 20000,200000,1000000
+"""
+import argparse
+import itertools
+import json
+import subprocess
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import harness  # noqa: E402
+
+sys.path.insert(0, str(harness.ROOT / "scripts"))
+
+import seed  # noqa: E402
+
+SERVICES = ["auth", "property", "leasing"]
+PASSWORD = "bench-password"
+
+
+def _insert(conn, sql: str, **params) -> int:
+    from sqlalchemy import text
+
+    return conn.execute(text(sql), params).scalar_one()
+
+
+def _user(conn, label: str) -> int:
+    return _insert(
+        conn,
+        "INSERT INTO auth.app_user (email, username, password_hash, role) "
+        "VALUES (:email, :label, 'x', 'USER') RETURNING id",
+        email=f"bench-{label}@bench.example.com",
+        label=label,
+    )
+
+
+def _unit(conn, user_id: int, label: str) -> int:
+    property_id = _insert(
+        conn,
+        "INSERT INTO property_mgmt.property (user_id, name, address, property_type) "
+        "VALUES (:user_id, :name, 'bench', 'OFFICE') RETURNING id",
+        user_id=user_id,
+        name=f"bench {label}",
+    )
+    return _insert(
+        conn,
+        "INSERT INTO property_mgmt.unit (property_id, unit_number, area, status, monthly_rent) "
+        "VALUES (:property_id, '1', 50, 'AVAILABLE', 50000) RETURNING id",
+        property_id=property_id,
+    )
+
+
+# --- auth-service ------------------------------------------------------------
+
+def auth_cases(client, conn, args):
+    from app.core.security import get_password_hash, verify_password
+
+    hashed = get_password_hash(PASSWORD)
+    yield "verify_password", lambda: verify_password(PASSWORD, hashed)
+    yield "get_password_hash", lambda: get_password_hash(PASSWORD)
+
+    user_id = _user(conn, "login")
+    from sqlalchemy import text
+
+    conn.execute(text("UPDATE auth.app_user SET password_hash = :h WHERE id = :id"), {"h": hashed, "id": user_id})
+    body = {"email": "bench-login@bench.example.com", "password": PASSWORD}
+    yield "POST /auth/login", lambda: harness.expect_status(client.post("/api/v1/auth/login", json=body), 200)
+
+
+# --- property-service --------------------------------------------------------
+
+# (метка, подстрока, limit): частая подстрока с пагинацией, редкая и без совпадений
+ILIKE_QUERIES = [("common", "БЦ", 100), ("rare", "Усадьба", None), ("miss", "нет такого", None)]
+# Объёмы property_mgmt.property для ILIKE (по возрастанию, см. --property-rows)
+PROPERTY_ROWS = [20_000, 200_000]
+
+
+def _grow_properties(conn, owner_id: int, rows: int, seed_value: int) -> int:
+    """
+    Дополняет property_mgmt.property объектами с распределением названий
+    scripts/seed.py (--seed seed_value), пока в таблице не станет rows строк.
+    Возвращает итоговое число строк.
+    """
+    from sqlalchemy import text
+
+    current = conn.execute(text("SELECT count(*) FROM property_mgmt.property")).scalar()
+    if current >= rows:
+        return current
+    world = seed.World(argparse.Namespace(
+        seed=seed_value, users=1, properties=rows, units_per_property=1.0, history_months=0, today=None,
+    ))
+    generated = (
+        (owner_id, name, address, description, property_type)
+        for (_, _, name, address, description, property_type), _ in itertools.islice(
+            world.properties(), current, rows
+        )
+    )
+    with conn.connection.cursor() as cur:
+        cur.copy_expert(
+            "COPY property_mgmt.property (user_id, name, address, description, property_type) FROM STDIN",
+            seed.RowStream(generated),
+            size=1 << 16,
+        )
+    # Без ANALYZE: его запись в pg_class переживает откат транзакции и
+    # испортила бы статистику засеянной БД. Планировщик и так масштабирует
+    # reltuples по фактическому числу страниц, а распределение значений то же
+    return rows
+
+
+def property_cases(client, conn, args):
+    from sqlalchemy import text
+    from app.core.catalog_index import catalog_index
+    from app.core.security import get_current_user
+
+    token = harness.make_token(1)
+    yield "get_current_user", lambda: get_current_user(token)
+
+    def public_list(name, limit):
+        params = {"name": name, **({"limit": limit} if limit else {})}
+        return lambda: harness.expect_status(client.get("/api/v1/properties/public", params=params), 200)
+
+    # владелец с наибольшим числом объектов — до добавления синтетических
+    top_owner_id = conn.execute(
+        text("SELECT user_id FROM property_mgmt.property GROUP BY user_id ORDER BY count(*) DESC LIMIT 1")
+    ).scalar()
+
+    # без построенного индекса каталога запрос уходит в ILIKE по таблице;
+    # таблица дорастает до каждого объёма внутри откатываемой транзакции
+    catalog_owner_id = _user(conn, "catalog")
+    rows = 0
+    for target in args.property_rows:
+        rows = _grow_properties(conn, catalog_owner_id, target, args.seed)
+        if rows > target:
+            print(f"  ! property_mgmt.property: {rows:,} rows, more than {target:,}")
+        for label, name, limit in ILIKE_QUERIES:
+            yield f"GET /properties/public ilike[{label},rows={rows}]", public_list(name, limit)
+
+    from app.db.session import SessionLocal
+
+    with SessionLocal(bind=conn, join_transaction_mode="create_savepoint") as db:
+        catalog_index.build(db)
+    for label, name, limit in ILIKE_QUERIES:
+        yield f"GET /properties/public index[{label},rows={rows}]", public_list(name, limit)
+
+    if top_owner_id is not None:
+        headers = {"Authorization": f"Bearer {harness.make_token(top_owner_id)}"}
+        yield "GET /properties/dashboard[top owner]", lambda: harness.expect_status(
+            client.get("/api/v1/properties/dashboard", headers=headers), 200
+        )
+
+
+# --- leasing-service ---------------------------------------------------------
+
+ACTIVE_LEASE_COUNTS = [1, 10, 100, 1000]
+PAYMENT_VOLUMES = [100, 1000, 10000]
+
+
+def _active_leases(conn, unit_id: int, user_id: int, count: int) -> date:
+    """count неперекрывающихся ACTIVE-договоров по 5 дней с шагом 10; дата начала последнего"""
+    from sqlalchemy import text
+
+    conn.execute(
+        text(
+            "INSERT INTO leasing.lease (unit_id, user_id, start_date, end_date, monthly_rent, status) "
+            "SELECT :unit_id, :user_id, DATE '2000-01-01' + i * 10, DATE '2000-01-01' + i * 10 + 5, 50000, 'ACTIVE' "
+            "FROM generate_series(0, :count - 1) AS i"
+        ),
+        {"unit_id": unit_id, "user_id": user_id, "count": count},
+    )
+    return date(2000, 1, 1) + timedelta(days=(count - 1) * 10)
+
+
+def leasing_cases(client, conn, args):
+    from sqlalchemy import text
+    from app.core.security import get_current_user
+
+    user_id = _user(conn, "tenant")
+    token = harness.make_token(user_id)
+    headers = {"Authorization": f"Bearer {token}"}
+    yield "get_current_user", lambda: get_current_user(token)
+
+    # create_lease: проверка пересечения загружает все ACTIVE-договоры помещения
+    for count in ACTIVE_LEASE_COUNTS:
+        unit_id = _unit(conn, user_id, f"leases-{count}")
+        last_start = _active_leases(conn, unit_id, user_id, count)
+        overlapping = {
+            "unit_id": unit_id,
+            "start_date": last_start.isoformat(),
+            "end_date": (last_start + timedelta(days=1)).isoformat(),
+            "monthly_rent": 50000,
+            "status": "ACTIVE",
+        }
+        yield f"POST /leases reject[active={count}]", lambda body=overlapping: harness.expect_status(
+            client.post("/api/v1/leases/", json=body, headers=headers), 400
+        )
+
+    # успешное создание: каждый раунд — новый неперекрывающийся период (в SAVEPOINT'е)
+    unit_id = _unit(conn, user_id, "accept")
+    _active_leases(conn, unit_id, user_id, 100)
+    periods = itertools.count()
+
+    def accept():
+        start = date(2200, 1, 1) + timedelta(days=next(periods) * 3)
+        body = {
+            "unit_id": unit_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=1)).isoformat(),
+            "monthly_rent": 50000,
+            "status": "ACTIVE",
+        }
+        harness.expect_status(client.post("/api/v1/leases/", json=body, headers=headers), 201)
+
+    yield "POST /leases accept[active=100+]", accept
+
+    # list_payments: отдельный арендатор с одним договором и volume платежами
+    for volume in PAYMENT_VOLUMES:
+        payer_id = _user(conn, f"payer-{volume}")
+        lease_id = _insert(
+            conn,
+            "INSERT INTO leasing.lease (unit_id, user_id, start_date, monthly_rent, status) "
+            "VALUES (:unit_id, :user_id, DATE '2000-01-01', 50000, 'ACTIVE') RETURNING id",
+            unit_id=_unit(conn, payer_id, f"payments-{volume}"),
+            user_id=payer_id,
+        )
+        conn.execute(
+            text(
+                "INSERT INTO leasing.payment (lease_id, payment_date, amount, status, method) "
+                "SELECT :lease_id, DATE '2000-01-01' + i, 50000, 'PAID', 'card' "
+                "FROM generate_series(0, :volume - 1) AS i"
+            ),
+            {"lease_id": lease_id, "volume": volume},
+        )
+        payer_headers = {"Authorization": f"Bearer {harness.make_token(payer_id)}"}
+        yield f"GET /payments[payments={volume}]", lambda h=payer_headers: harness.expect_status(
+            client.get("/api/v1/payments/", headers=h), 200
+        )
+
+
+CASES = {"auth": auth_cases, "property": property_cases, "leasing": leasing_cases}
+TABLES = {
+    "auth": ["auth.app_user"],
+    "property": ["property_mgmt.property", "property_mgmt.unit"],
+    "leasing": ["leasing.lease", "leasing.payment"],
+}
+
+
+def run_service(args) -> int:
+    from fastapi.testclient import TestClient
+
+    module = harness.load_service(args.service)
+    # без with: startup-хуки (LISTEN, индекс каталога) не запускаются
+    client = TestClient(module.app)
+    print(f"{args.service}-service:")
+    with harness.rollback_db(module.app) as conn:
+        meta = {"rows": harness.table_sizes(conn, TABLES[args.service])}
+        if args.service == "property":
+            meta["property_rows"] = args.property_rows
+        report = harness.run_suite(
+            args.service,
+            CASES[args.service](client, conn, args),
+            meta,
+            name_filter=args.k,
+            min_rounds=args.min_rounds,
+            min_time=args.min_time,
+        )
+
+    path = harness.baseline_path(args.service, Path(args.baselines))
+    if args.out:
+        harness.save_baseline(report, Path(args.out.format(service=args.service)))
+    if args.save:
+        harness.save_baseline(report, path)
+        print(f"  baseline saved to {path}")
+    if args.compare:
+        if not path.exists():
+            print(f"  no baseline at {path}")
+            return 1
+        if not harness.compare(report, json.loads(path.read_text(encoding="utf-8")), args.threshold):
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки обработчиков бэкендов")
+    parser.add_argument("service", choices=SERVICES + ["all"])
+    parser.add_argument("-k", help="запускать только бенчмарки, в имени которых есть подстрока")
+    parser.add_argument("--save", action="store_true", help="записать результат как базовую линию")
+    parser.add_argument("--compare", action="store_true", help="сравнить с базовой линией")
+    parser.add_argument("--threshold", type=float, default=0.25, help="допустимый рост медианы (0.25 = +25%%)")
+    parser.add_argument("--baselines", default=str(harness.BASELINES))
+    parser.add_argument("--out", help="дополнительно записать результат в файл ({service} — имя сервиса)")
+    parser.add_argument("--min-rounds", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=1.0, help="секунд на бенчмарк")
+    parser.add_argument(
+        "--property-rows",
+        default=",".join(str(rows) for rows in PROPERTY_ROWS),
+        help="объёмы property_mgmt.property для ILIKE через запятую (по умолчанию %(default)s)",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="seed синтетических объектов, как у scripts/seed.py")
+    args = parser.parse_args()
+    args.property_rows = sorted(int(rows) for rows in args.property_rows.split(","))
+
+    if args.service != "all":
+        sys.exit(run_service(args))
+
+    failed = False
+    argv = [a for a in sys.argv[1:] if a != "all"]
+    for service in SERVICES:
+        failed |= subprocess.run([sys.executable, __file__, service, *argv]).returncode != 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк страниц фронтенда на поддельных бэкендах (benchmarks/stubs.py).
+
+Запускает поддельные auth/property/leasing и фронтенд (uvicorn) отдельными
+процессами, затем по каждой странице держит --concurrency параллельных
+клиентов в течение --duration секунд и считает rps, p50/p95/p99 и ошибки.
+Бэкенды детерминированы (данные и задержки задаются --seed), поэтому прогоны
+с разными настройками фронтенда сравнимы между собой:
+
+    python benchmarks/frontend.py --save                          # базовая линия
+    python benchmarks/frontend.py --env PAGE_CACHE_TTL=0 --compare
+    python benchmarks/frontend.py --server gunicorn --workers 4 --compare
+    python benchmarks/frontend.py --latency property=lognormal:20:200 --errors 0.01 \\
+        --env BACKEND_HEDGE=1 --pages catalog_detail,leases
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import harness  # noqa: E402
+import stubs  # noqa: E402
+
+FRONTEND_DIR = harness.ROOT / "frontend-service"
+
+
+def page_urls(data: stubs.Dataset) -> dict:
+    """Страница → (функция i → путь, cookie пользователя или None)"""
+    owner = data.top_owner()
+    tenant = data.top_tenant()
+    owner_property = data.owned_properties(owner)[0]["id"]
+    property_ids = sorted(data.properties)
+    return {
+        "catalog": (lambda i: "/catalog", None),
+        "catalog_search": (lambda i: f"/catalog?name={stubs.STREETS[i % len(stubs.STREETS)]}", None),
+        "catalog_detail": (lambda i: f"/catalog/{property_ids[i % len(property_ids)]}", None),
+        "suggest": (lambda i: "/catalog/suggest?q=" + stubs.STREETS[i % len(stubs.STREETS)][:2], None),
+        "properties": (lambda i: "/properties", owner),
+        "units": (lambda i: f"/properties/{owner_property}/units", owner),
+        "dashboard": (lambda i: "/dashboard", owner),
+        "leases": (lambda i: "/leases", tenant),
+    }
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url, timeout=1.0)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise SystemExit(f"{url} не отвечает")
+            await asyncio.sleep(0.2)
+
+
+async def load_page(base: str, path_for, user, concurrency: int, duration: float, warmup: float) -> dict:
+    cookies = {"access_token": stubs.make_token(user)} if user else None
+    latencies, errors, counter = [], 0, iter(range(1 << 62))
+    recording = False
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while not stop.is_set():
+            path = path_for(next(counter))
+            started = time.perf_counter()
+            try:
+                resp = await client.get(path)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if recording:
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, cookies=cookies, limits=limits, timeout=30.0) as client:
+        tasks = [asyncio.create_task(worker(client)) for _ in range(concurrency)]
+        await asyncio.sleep(warmup)
+        recording = True
+        started = time.perf_counter()
+        await asyncio.sleep(duration)
+        recording = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    latencies.sort()
+    if not latencies:
+        return {"rounds": 0, "errors": errors}
+
+    def pct(q):
+        return round(latencies[max(0, math.ceil(q * len(latencies)) - 1)] * 1000, 3)
+
+    return {
+        "rounds": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "min_ms": round(latencies[0] * 1000, 3),
+        "median_ms": round(statistics.median(latencies) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "stddev_ms": round(statistics.pstdev(latencies) * 1000, 3),
+    }
+
+
+def start_processes(args) -> list:
+    stub_cmd = [sys.executable, str(Path(stubs.__file__)), "--port", str(args.stub_port),
+                "--users", str(args.users), "--properties", str(args.properties),
+                "--units-per-property", str(args.units_per_property), "--seed", str(args.seed)]
+    for spec in args.latency or []:
+        stub_cmd += ["--latency", spec]
+    for spec in args.errors or []:
+        stub_cmd += ["--errors", spec]
+
+    env = {
+        **os.environ,
+        "AUTH_BASE": f"http://127.0.0.1:{args.stub_port}",
+        "PROPERTY_BASE": f"http://127.0.0.1:{args.stub_port + 1}",
+        "LEASING_BASE": f"http://127.0.0.1:{args.stub_port + 2}",
+    }
+    for item in args.env or []:
+        key, _, value = item.partition("=")
+        env[key] = value
+    if args.server == "gunicorn":
+        # production-профиль frontend-service/gunicorn.conf.py; без --workers
+        # число воркеров берётся из него (WEB_CONCURRENCY или число ядер)
+        frontend_cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app",
+                        "--bind", f"127.0.0.1:{args.port}", "--log-level", "warning"]
+        if args.workers is not None:
+            frontend_cmd += ["--workers", str(args.workers)]
+    else:
+        frontend_cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                        "--port", str(args.port), "--log-level", "warning", "--no-access-log",
+                        "--workers", str(args.workers or 1)]
+    # каждый поддельный сервис — в своём процессе, чтобы под нагрузкой
+    # узким местом был фронтенд, а не общий для заглушек GIL
+    processes = [subprocess.Popen(stub_cmd + ["--service", service]) for service in stubs.SERVICES]
+    processes.append(subprocess.Popen(frontend_cmd, cwd=FRONTEND_DIR, env=env))
+    return processes
+
+
+async def run(args) -> dict:
+    data = stubs.build_dataset(args)
+    pages = page_urls(data)
+    selected = args.pages.split(",") if args.pages else list(pages)
+    unknown = set(selected) - set(pages)
+    if unknown:
+        raise SystemExit(f"Неизвестные страницы: {', '.join(sorted(unknown))}")
+
+    for offset in range(3):
+        await wait_ready(f"http://127.0.0.1:{args.stub_port + offset}/health")
+    base = f"http://127.0.0.1:{args.port}"
+    await wait_ready(f"{base}/health")
+
+    results = {}
+    for name in selected:
+        path_for, user = pages[name]
+        stats = await load_page(base, path_for, user, args.concurrency, args.duration, args.warmup)
+        results[name] = stats
+        if stats["rounds"]:
+            print(f"  {name:<16} {stats['rps']:>8.1f} rps  p50 {stats['median_ms']:>8.1f}  "
+                  f"p95 {stats['p95_ms']:>8.1f}  p99 {stats['p99_ms']:>8.1f} ms  errors {stats['errors']}",
+                  flush=True)
+        else:
+            print(f"  {name:<16} no completed requests", flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк страниц фронтенда на поддельных бэкендах")
+    stubs.add_arguments(parser)
+    parser.add_argument("--pages", help="страницы через запятую (по умолчанию все)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд замера на страницу")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn",
+                        help="uvicorn (как в Dockerfile) или production-профиль gunicorn")
+    parser.add_argument("--workers", type=int, help="процессов фронтенда (uvicorn — по умолчанию 1)")
+    parser.add_argument("--env", action="append", metavar="KEY=VALUE", help="переменные окружения фронтенда")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--stub-port", type=int, default=9001)
+    parser.add_argument("--save", action="store_true", help="записать результат как базовую линию")
+    parser.add_argument("--compare", action="store_true", help="сравнить с базовой линией")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--baselines", default=str(harness.BASELINES))
+    parser.add_argument("--out", help="дополнительно записать результат в файл")
+    args = parser.parse_args()
+
+    processes = start_processes(args)
+    try:
+        print("frontend-service (stub backends):")
+        results = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    meta = {
+        "concurrency": args.concurrency,
+        "server": args.server,
+        "workers": args.workers,
+        "env": sorted(args.env or []),
+        "latency": sorted(args.latency or []),
+        "errors": sorted(args.errors or []),
+        "dataset": {"users": args.users, "properties": args.properties, "seed": args.seed},
+    }
+    report = {"service": "frontend", "commit": harness.git_commit(), "meta": meta, "benchmarks": results}
+    path = harness.baseline_path("frontend", Path(args.baselines))
+    if args.out:
+        harness.save_baseline(report, Path(args.out))
+    if args.save:
+        harness.save_baseline(report, path)
+        print(f"  baseline saved to {path}")
+    if args.compare:
+        if not path.exists():
+            print(f"  no baseline at {path}")
+            sys.exit(1)
+        if not harness.compare(report, json.loads(path.read_text(encoding="utf-8")), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
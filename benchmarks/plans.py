@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Снимки планов запросов обработчиков: EXPLAIN (FORMAT JSON) для каждого SQL,
+выполненного сценариями, на засеянной БД.
+
+SQL собирается через app.core.query_stats.track_queries() (текст и параметры
+запросов каждого HTTP-запроса), затем для каждого уникального запроса
+выполняется EXPLAIN с теми же параметрами. Снимки лежат в
+benchmarks/plans/<service>.json: форма плана (узлы, таблицы, индексы) — по
+строке на узел, чтобы изменения были видны в diff, и оценка стоимости.
+
+Проверка (по умолчанию) падает, если:
+- в плане появился Seq Scan по большой таблице (больше --large-rows строк),
+  которого не было в снимке;
+- оценка стоимости выросла больше чем на --cost-threshold;
+- сценарий выполнил SQL, которого нет в снимке.
+
+    python benchmarks/plans.py all --update     # записать снимки
+    python benchmarks/plans.py leasing          # сравнить со снимком
+"""
+import argparse
+import json
+import subprocess
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import harness  # noqa: E402
+
+SERVICES = ["auth", "property", "leasing"]
+PLANS = Path(__file__).resolve().parent / "plans"
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def _scalar(conn, sql: str, **params):
+    from sqlalchemy import text
+
+    return conn.execute(text(sql), params).scalar()
+
+
+def _ok(response):
+    if response.status_code >= 400:
+        raise AssertionError(f"{response.request.method} {response.request.url}: "
+                             f"{response.status_code}: {response.text[:200]}")
+    return response
+
+
+# --- сценарии: (имя, функция(client)) ---------------------------------------
+
+def auth_scenarios(conn):
+    body = {"email": "plans@bench.example.com", "username": "plans", "password": "plans-password"}
+    yield "POST /auth/register", lambda client: _ok(client.post("/api/v1/auth/register", json=body))
+    yield "POST /auth/login", lambda client: _ok(client.post("/api/v1/auth/login", json={
+        "email": body["email"], "password": body["password"],
+    }))
+
+
+def property_scenarios(conn):
+    owner_id = _scalar(conn, "SELECT user_id FROM property_mgmt.property "
+                             "GROUP BY user_id ORDER BY count(*) DESC LIMIT 1")
+    property_id = _scalar(conn, "SELECT min(id) FROM property_mgmt.property WHERE user_id = :u", u=owner_id)
+    unit_id = _scalar(conn, "SELECT min(id) FROM property_mgmt.unit WHERE property_id = :p", p=property_id)
+    if unit_id is None:
+        raise SystemExit("Нет данных: сначала запустите scripts/seed.py")
+    auth = {"Authorization": f"Bearer {harness.make_token(owner_id)}"}
+
+    yield "GET /properties/public?name", lambda c: _ok(c.get("/api/v1/properties/public",
+                                                            params={"name": "БЦ", "limit": 50}))
+    yield "GET /properties/public?after_id", lambda c: _ok(c.get("/api/v1/properties/public",
+                                                                params={"after_id": 1000, "limit": 50}))
+    yield "GET /properties/", lambda c: _ok(c.get("/api/v1/properties/", params={"limit": 50}, headers=auth))
+    yield "GET /properties/{id}", lambda c: _ok(c.get(f"/api/v1/properties/{property_id}"))
+    yield "GET /properties/dashboard", lambda c: _ok(c.get("/api/v1/properties/dashboard", headers=auth))
+    yield "POST /properties/", lambda c: _ok(c.post("/api/v1/properties/", headers=auth, json={
+        "name": "plans", "address": "plans", "property_type": "OFFICE",
+    }))
+    yield "GET /units/public", lambda c: _ok(c.get("/api/v1/units/public", params={"property_id": property_id}))
+    yield "GET /units/search", lambda c: _ok(c.get("/api/v1/units/search", params={
+        "min_rent": 50000, "max_rent": 150000, "floor": 3, "facets": True,
+    }))
+    yield "GET /units/search?type", lambda c: _ok(c.get("/api/v1/units/search", params={
+        "property_type": "WAREHOUSE",
+    }))
+    yield "GET /units/", lambda c: _ok(c.get("/api/v1/units/", params={"property_id": property_id}, headers=auth))
+    yield "GET /units/public/{id}", lambda c: _ok(c.get(f"/api/v1/units/public/{unit_id}"))
+    yield "GET /units/{id}", lambda c: _ok(c.get(f"/api/v1/units/{unit_id}", headers=auth))
+    yield "POST /units/", lambda c: _ok(c.post("/api/v1/units/", headers=auth, json={
+        "property_id": property_id, "unit_number": "plans-1", "area": 10, "floor": 1,
+        "status": "AVAILABLE", "monthly_rent": 10000,
+    }))
+    yield "PATCH /units/{id}/status", lambda c: _ok(c.patch(f"/api/v1/units/{unit_id}/status",
+                                                           params={"status_value": "MAINTENANCE"}, headers=auth))
+
+
+def _units_token(owner_id: int, unit_ids) -> str:
+    from datetime import datetime
+    from jose import jwt
+    from app.core.config import settings
+    from app.core.security import UNITS_TOKEN_AUDIENCE
+
+    payload = {
+        "sub": str(owner_id),
+        "aud": UNITS_TOKEN_AUDIENCE,
+        "unit_ids": list(unit_ids),
+        "exp": datetime.utcnow() + timedelta(minutes=5),
+    }
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def leasing_scenarios(conn):
+    from sqlalchemy import text
+
+    tenant_id = _scalar(conn, "SELECT user_id FROM leasing.lease GROUP BY user_id ORDER BY count(*) DESC LIMIT 1")
+    lease_id = _scalar(conn, "SELECT max(id) FROM leasing.lease WHERE user_id = :u", u=tenant_id)
+    if lease_id is None:
+        raise SystemExit("Нет данных: сначала запустите scripts/seed.py")
+    unit_id = _scalar(conn, "SELECT unit_id FROM leasing.lease WHERE id = :l", l=lease_id)
+    owner_id = _scalar(conn, "SELECT user_id FROM property_mgmt.property "
+                             "GROUP BY user_id ORDER BY count(*) DESC LIMIT 1")
+    owner_units = [row[0] for row in conn.execute(text(
+        "SELECT u.id FROM property_mgmt.unit u JOIN property_mgmt.property p ON p.id = u.property_id "
+        "WHERE p.user_id = :u ORDER BY u.id"), {"u": owner_id})]
+    auth = {"Authorization": f"Bearer {harness.make_token(tenant_id)}"}
+    owner_auth = {"Authorization": f"Bearer {harness.make_token(owner_id)}"}
+    today = date.today()
+    window = {"from": today.isoformat(), "to": (today + timedelta(days=180)).isoformat()}
+
+    yield "GET /leases/availability", lambda c: _ok(c.get("/api/v1/leases/availability",
+                                                          params={"unit_id": unit_id, **window}))
+    yield "GET /leases/availability/batch", lambda c: _ok(c.get("/api/v1/leases/availability/batch",
+                                                                params={"unit_ids": owner_units[:50], **window}))
+    yield "POST /leases/summary", lambda c: _ok(c.post("/api/v1/leases/summary", headers=owner_auth, json={
+        "units_token": _units_token(owner_id, owner_units),
+    }))
+    yield "GET /leases/", lambda c: _ok(c.get("/api/v1/leases/", params={"limit": 50}, headers=auth))
+    yield "POST /leases/", lambda c: _ok(c.post("/api/v1/leases/", headers=auth, json={
+        "unit_id": unit_id, "start_date": "2300-01-01", "end_date": "2300-12-31",
+        "monthly_rent": 10000, "status": "DRAFT",
+    }))
+    yield "GET /payments/", lambda c: _ok(c.get("/api/v1/payments/", headers=auth))
+    yield "GET /payments/?lease_id", lambda c: _ok(c.get("/api/v1/payments/", params={"lease_id": lease_id},
+                                                         headers=auth))
+    yield "POST /payments/", lambda c: _ok(c.post("/api/v1/payments/", headers=auth, json={
+        "lease_id": lease_id, "payment_date": today.isoformat(), "amount": 10000,
+        "status": "PAID", "method": "card",
+    }))
+
+
+SCENARIOS = {"auth": auth_scenarios, "property": property_scenarios, "leasing": leasing_scenarios}
+
+
+# --- планы -------------------------------------------------------------------
+
+def _relation(node: dict) -> str:
+    if "Relation Name" not in node:
+        return ""
+    return f"{node['Schema']}.{node['Relation Name']}" if node.get("Schema") else node["Relation Name"]
+
+
+def plan_shape(node: dict, depth: int = 0, lines=None, seq_scans=None):
+    """Строки «узел on таблица using индекс» без чисел и список Seq Scan'ов"""
+    lines = [] if lines is None else lines
+    seq_scans = [] if seq_scans is None else seq_scans
+    label = node["Node Type"]
+    if node.get("Join Type") and ("Join" in label or label == "Nested Loop"):
+        label = f"{node.get('Join Type', '')} {label}".strip()
+    relation = _relation(node)
+    if relation:
+        label += f" on {relation}"
+    if node.get("Index Name"):
+        label += f" using {node['Index Name']}"
+    lines.append("  " * depth + label)
+    if node["Node Type"] == "Seq Scan":
+        seq_scans.append(relation)
+    for child in node.get("Plans", []):
+        plan_shape(child, depth + 1, lines, seq_scans)
+    return lines, seq_scans
+
+
+def explain(conn, statement: str, parameters) -> dict:
+    savepoint = conn.begin_nested()
+    try:
+        raw = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON, VERBOSE) {statement}", parameters).scalar()
+    finally:
+        savepoint.rollback()
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    lines, seq_scans = plan_shape(plan)
+    return {"sql": " ".join(statement.split()), "cost": plan["Total Cost"], "plan": lines,
+            "seq_scans": sorted(set(seq_scans))}
+
+
+def capture(service: str, client, conn) -> dict:
+    from app.core.query_stats import track_queries
+
+    snapshot = {}
+    for name, scenario in SCENARIOS[service](conn):
+        with track_queries() as tracked:
+            scenario(client)
+        entries, seen = [], set()
+        for stats in tracked:
+            for statement, parameters, _ in stats.queries:
+                key = " ".join(statement.split())
+                if key in seen or not key.upper().startswith(EXPLAINABLE):
+                    continue
+                seen.add(key)
+                entries.append(explain(conn, statement, parameters))
+        snapshot[name] = entries
+        print(f"  {name:<36} {len(entries)} queries", flush=True)
+    return snapshot
+
+
+def large_tables(conn, snapshot: dict, min_rows: int) -> set:
+    from sqlalchemy import text
+
+    tables = {t for entries in snapshot.values() for entry in entries for t in entry["seq_scans"]}
+    large = set()
+    for table in tables:
+        rows = conn.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}
+        ).scalar()
+        if rows is not None and rows > min_rows:
+            large.add(table)
+    return large
+
+
+def check(current: dict, saved: dict, large: set, cost_threshold: float) -> bool:
+    ok = True
+    for name, entries in current.items():
+        saved_entries = {entry["sql"]: entry for entry in saved.get(name, [])}
+        for entry in entries:
+            before = saved_entries.get(entry["sql"])
+            short = entry["sql"][:100]
+            if before is None:
+                print(f"  FAIL {name}: new query without snapshot (run with --update and review)\n       {short}")
+                ok = False
+                continue
+            new_scans = (set(entry["seq_scans"]) - set(before["seq_scans"])) & large
+            if new_scans:
+                print(f"  FAIL {name}: new Seq Scan on {', '.join(sorted(new_scans))}\n       {short}")
+                ok = False
+            if before["cost"] and entry["cost"] > before["cost"] * (1 + cost_threshold):
+                print(f"  FAIL {name}: cost {before['cost']:.1f} -> {entry['cost']:.1f}\n       {short}")
+                ok = False
+            if entry["plan"] != before["plan"]:
+                print(f"  plan changed in {name}:\n       {short}")
+                for line in entry["plan"]:
+                    print(f"         {line}")
+    for name, entries in current.items():
+        for entry in entries:
+            known = set(entry["seq_scans"]) & large
+            if known:
+                print(f"  note {name}: Seq Scan on {', '.join(sorted(known))} (in snapshot)")
+    return ok
+
+
+def run_service(args) -> int:
+    from fastapi.testclient import TestClient
+
+    module = harness.load_service(args.service)
+    client = TestClient(module.app)
+    path = Path(args.plans) / f"{args.service}.json"
+    print(f"{args.service}-service:")
+    with harness.rollback_db(module.app) as conn:
+        snapshot = capture(args.service, client, conn)
+        large = large_tables(conn, snapshot, args.large_rows)
+
+    if args.update:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(snapshot, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"  snapshot saved to {path}")
+        return 0
+    if not path.exists():
+        print(f"  no snapshot at {path}; run with --update")
+        return 1
+    return 0 if check(snapshot, json.loads(path.read_text(encoding="utf-8")), large, args.cost_threshold) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Снимки EXPLAIN для SQL обработчиков")
+    parser.add_argument("service", choices=SERVICES + ["all"])
+    parser.add_argument("--update", action="store_true", help="перезаписать снимки")
+    parser.add_argument("--plans", default=str(PLANS))
+    parser.add_argument("--large-rows", type=int, default=10_000, help="таблица больше — Seq Scan запрещён")
+    parser.add_argument("--cost-threshold", type=float, default=0.5, help="допустимый рост стоимости (0.5 = +50%%)")
+    args = parser.parse_args()
+
+    if args.service != "all":
+        sys.exit(run_service(args))
+    argv = [a for a in sys.argv[1:] if a != "all"]
+    failed = False
+    for service in SERVICES:
+        failed |= subprocess.run([sys.executable, __file__, service, *argv]).returncode != 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
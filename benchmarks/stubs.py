@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Поддельные auth/property/leasing для бенчмарков фронтенда без БД.
+
+Ответы строятся по тем же pydantic-схемам, что у настоящих сервисов
+(<service>-service/app/schemas загружаются по пути файла), из детерминированного
+набора данных в памяти. На каждый запрос можно наложить задержку из заданного
+распределения и долю ошибок 503 — отдельно для каждого сервиса:
+
+    python benchmarks/stubs.py --latency property=lognormal:20:80 --errors leasing=0.02
+
+Спецификации задержки (миллисекунды):
+    const:5            — всегда 5 мс
+    uniform:5:30       — равномерно от 5 до 30 мс
+    lognormal:20:80    — логнормальное с медианой 20 и p99 80 мс
+
+Фронтенд подключается через AUTH_BASE/PROPERTY_BASE/LEASING_BASE (их печатает
+скрипт при старте). GET-ответы отдаются с ETag и поддерживают If-None-Match,
+как у настоящих бэкендов.
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import math
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import jwt
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICES = ["auth", "property", "leasing"]
+SCHEMA_FILES = {
+    "auth": "auth-service/app/schemas/user.py",
+    "property": "property-service/app/schemas/property.py",
+    "leasing": "leasing-service/app/schemas/leasing.py",
+}
+TOKEN_SECRET = "stub-secret-for-frontend-benchmarks-only"
+
+NAME_PREFIXES = ["БЦ", "ЖК", "Склад", "ТЦ", "Офисный центр", "Лофт"]
+STREETS = ["Ленина", "Мира", "Гагарина", "Садовая", "Пушкина", "Тверская", "Лесная", "Победы"]
+PROPERTY_TYPES = ["OFFICE", "APARTMENT", "WAREHOUSE", "RETAIL"]
+
+
+def load_schemas(service: str):
+    """Модуль схем сервиса под уникальным именем (пакеты app одноимённы)"""
+    spec = importlib.util.spec_from_file_location(f"stub_{service}_schemas", ROOT / SCHEMA_FILES[service])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- задержки и ошибки -------------------------------------------------------
+
+class Latency:
+    def __init__(self, spec: str = "const:0"):
+        kind, *params = spec.split(":")
+        values = [float(p) / 1000 for p in params]
+        if kind == "const" and len(values) == 1:
+            self._sample = lambda rng: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda rng: rng.uniform(*values)
+        elif kind == "lognormal" and len(values) == 2:
+            median, p99 = values
+            mu = math.log(median)
+            sigma = (math.log(p99) - mu) / 2.326 if p99 > median else 0.0
+            self._sample = lambda rng: rng.lognormvariate(mu, sigma)
+        else:
+            raise ValueError(f"Неверная спецификация задержки: {spec}")
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        return self._sample(rng)
+
+
+class FaultMiddleware:
+    """ASGI-middleware: задержка перед ответом и доля ответов 503"""
+
+    def __init__(self, app, latency: Latency, error_rate: float, rng: random.Random):
+        self.app = app
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = rng
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/health":
+            await self.app(scope, receive, send)
+            return
+        delay = self.latency.sample(self.rng)
+        failed = self.rng.random() < self.error_rate
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if not failed:
+            await self.app(scope, receive, send)
+            return
+        body = b'{"detail":"Injected failure"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# --- данные ------------------------------------------------------------------
+
+def make_token(user_id: int, role: str = "USER") -> str:
+    return jwt.encode({"sub": str(user_id), "role": role}, TOKEN_SECRET, algorithm="HS256")
+
+
+class Dataset:
+    """Детерминированный набор данных: владельцы по Ципфу, помещения, договоры"""
+
+    def __init__(self, users: int = 1000, properties: int = 2000, units_per_property: float = 5.0, seed: int = 42):
+        rng = random.Random(f"{seed}:stub-data")
+        self.users = users
+        self.properties: Dict[int, dict] = {}
+        self.units: Dict[int, dict] = {}
+        self.units_by_property: Dict[int, List[int]] = {}
+        self.properties_by_owner: Dict[int, List[int]] = {}
+        self.leases: Dict[int, dict] = {}
+        self.leases_by_user: Dict[int, List[int]] = {}
+        self.active_by_unit: Dict[int, dict] = {}
+        today = date.today()
+        for property_id in range(1, properties + 1):
+            street = rng.choice(STREETS)
+            house = rng.randint(1, 200)
+            self.properties[property_id] = {
+                "id": property_id,
+                "user_id": min(users, int(users ** rng.random())),
+                "name": f"{rng.choice(NAME_PREFIXES)} «{street} {house}»",
+                "address": f"ул. {street}, д. {house}",
+                "description": None,
+                "property_type": rng.choice(PROPERTY_TYPES),
+            }
+            self.properties_by_owner.setdefault(self.properties[property_id]["user_id"], []).append(property_id)
+            ids = self.units_by_property[property_id] = []
+            count = 1
+            while rng.random() > 1 / units_per_property:
+                count += 1
+            for number in range(1, count + 1):
+                unit_id = len(self.units) + 1
+                occupied = rng.random() < 0.85
+                self.units[unit_id] = {
+                    "id": unit_id,
+                    "property_id": property_id,
+                    "unit_number": f"{number:03d}",
+                    "area": round(rng.lognormvariate(4.0, 0.6), 2),
+                    "floor": rng.randint(1, 20),
+                    "status": "OCCUPIED" if occupied else "AVAILABLE",
+                    "monthly_rent": float(rng.randint(20, 300) * 1000),
+                }
+                ids.append(unit_id)
+                if occupied:
+                    start = today - timedelta(days=rng.randint(0, 365))
+                    self.add_lease(rng.randint(1, users), {
+                        "unit_id": unit_id,
+                        "start_date": start,
+                        "end_date": start + timedelta(days=365),
+                        "monthly_rent": self.units[unit_id]["monthly_rent"],
+                        "status": "ACTIVE",
+                    })
+
+    def add_lease(self, user_id: int, data: dict) -> dict:
+        lease = {"id": len(self.leases) + 1, **data}
+        self.leases[lease["id"]] = lease
+        self.leases_by_user.setdefault(user_id, []).append(lease["id"])
+        if lease["status"] == "ACTIVE":
+            self.active_by_unit[lease["unit_id"]] = lease
+        return lease
+
+    def owned_properties(self, user_id: int) -> List[dict]:
+        return [self.properties[i] for i in self.properties_by_owner.get(user_id, [])]
+
+    def add_property(self, prop: dict) -> dict:
+        self.properties[prop["id"]] = prop
+        self.properties_by_owner.setdefault(prop["user_id"], []).append(prop["id"])
+        self.units_by_property[prop["id"]] = []
+        return prop
+
+    def top_owner(self) -> int:
+        owners = self.properties_by_owner
+        return max(owners, key=lambda user_id: (len(owners[user_id]), -user_id))
+
+    def top_tenant(self) -> int:
+        return max(self.leases_by_user, key=lambda user_id: (len(self.leases_by_user[user_id]), -user_id))
+
+
+def _page(items: List[dict], after_id: Optional[int], limit: Optional[int]) -> List[dict]:
+    if after_id is not None:
+        items = [item for item in items if item["id"] > after_id]
+    return items[:limit] if limit is not None else items
+
+
+def _respond(request: Request, data, status_code: int = 200) -> Response:
+    """JSON-ответ с ETag по телу; If-None-Match → 304"""
+    body = json.dumps(jsonable_encoder(data), ensure_ascii=False).encode()
+    if request.method != "GET":
+        return Response(body, status_code=status_code, media_type="application/json")
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, status_code=status_code, media_type="application/json", headers={"ETag": etag})
+
+
+def current_user_id(authorization: Optional[str] = Header(None)) -> int:
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        return int(jwt.decode(authorization[7:], options={"verify_signature": False})["sub"])
+    except (jwt.PyJWTError, KeyError, ValueError):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+
+# --- приложения ---------------------------------------------------------------
+
+def auth_app(data: Dataset) -> FastAPI:
+    schemas = load_schemas("auth")
+    app = FastAPI(title="Auth Service (stub)")
+
+    @app.post("/api/v1/auth/login")
+    def login(request: Request, user_in: schemas.UserLogin):
+        local = user_in.email.split("@")[0]
+        user_id = int(local[4:]) if local.startswith("user") and local[4:].isdigit() else 1
+        token = schemas.Token(access_token=make_token(user_id), token_type="bearer")
+        return _respond(request, token)
+
+    @app.post("/api/v1/auth/register")
+    def register(request: Request, user_in: schemas.UserCreate):
+        data.users += 1
+        user = schemas.UserRead(id=data.users, email=user_in.email, username=user_in.username, is_active=True)
+        return _respond(request, user, 201)
+
+    return app
+
+
+def property_app(data: Dataset) -> FastAPI:
+    schemas = load_schemas("property")
+    app = FastAPI(title="Property Service (stub)")
+
+    def read(prop: dict):
+        return schemas.PropertyRead(**prop)
+
+    @app.get("/api/v1/properties/public")
+    def list_public(request: Request, name: Optional[str] = None, address: Optional[str] = None,
+                    after_id: Optional[int] = None, limit: Optional[int] = None):
+        items = [
+            p for p in data.properties.values()
+            if (not name or name.casefold() in p["name"].casefold())
+            and (not address or address.casefold() in p["address"].casefold())
+        ]
+        return _respond(request, [read(p) for p in _page(items, after_id, limit)])
+
+    @app.get("/api/v1/properties/suggest")
+    def suggest(request: Request, q: str, field: str = "name", limit: int = 10):
+        q = q.casefold()
+        values = sorted({p[field] for p in data.properties.values()
+                         if any(word.casefold().startswith(q) for word in p[field].split())})
+        return _respond(request, values[:limit])
+
+    @app.get("/api/v1/properties/dashboard")
+    def dashboard(request: Request, user_id: int = Depends(current_user_id)):
+        items, totals, unit_ids = [], {}, []
+        for prop in data.owned_properties(user_id):
+            ids = data.units_by_property[prop["id"]]
+            by_status: Dict[str, int] = {}
+            for unit_id in ids:
+                status = data.units[unit_id]["status"]
+                by_status[status] = by_status.get(status, 0) + 1
+                totals[status] = totals.get(status, 0) + 1
+            items.append(schemas.PropertyDashboardItem(
+                **prop, units_total=len(ids), units_by_status=by_status, unit_ids=ids,
+            ))
+            unit_ids.extend(ids)
+        token = jwt.encode({"sub": str(user_id), "unit_ids": unit_ids}, TOKEN_SECRET, algorithm="HS256")
+        return _respond(request, schemas.OwnerDashboard(
+            properties=items, units_total=len(unit_ids), units_by_status=totals, units_token=token,
+        ))
+
+    @app.get("/api/v1/properties/")
+    def list_own(request: Request, after_id: Optional[int] = None, limit: Optional[int] = None,
+                 user_id: int = Depends(current_user_id)):
+        return _respond(request, [read(p) for p in _page(data.owned_properties(user_id), after_id, limit)])
+
+    @app.get("/api/v1/properties/{property_id}")
+    def get_property(request: Request, property_id: int):
+        if property_id not in data.properties:
+            raise HTTPException(status_code=404, detail="Property not found")
+        return _respond(request, read(data.properties[property_id]))
+
+    @app.post("/api/v1/properties/")
+    def create_property(request: Request, prop_in: schemas.PropertyCreate, user_id: int = Depends(current_user_id)):
+        prop = data.add_property({"id": max(data.properties) + 1, "user_id": user_id, **prop_in.dict()})
+        return _respond(request, read(prop), 201)
+
+    @app.get("/api/v1/units/public")
+    def list_units_public(request: Request, property_id: int):
+        if property_id not in data.properties:
+            raise HTTPException(status_code=404, detail="Property not found")
+        units = [data.units[i] for i in data.units_by_property[property_id]]
+        return _respond(request, [schemas.UnitRead(**u) for u in units if u["status"] == "AVAILABLE"])
+
+    @app.get("/api/v1/units/public/{unit_id}")
+    def get_unit_public(request: Request, unit_id: int):
+        if unit_id not in data.units:
+            raise HTTPException(status_code=404, detail="Unit not found")
+        return _respond(request, schemas.UnitRead(**data.units[unit_id]))
+
+    @app.get("/api/v1/units/")
+    def list_units(request: Request, property_id: Optional[int] = None, after_id: Optional[int] = None,
+                   limit: Optional[int] = None, user_id: int = Depends(current_user_id)):
+        owned = [p["id"] for p in data.owned_properties(user_id)]
+        if property_id is not None:
+            if property_id not in owned:
+                raise HTTPException(status_code=404, detail="Property not found or access denied")
+            owned = [property_id]
+        units = sorted((data.units[i] for p in owned for i in data.units_by_property[p]), key=lambda u: u["id"])
+        return _respond(request, [schemas.UnitRead(**u) for u in _page(units, after_id, limit)])
+
+    @app.post("/api/v1/units/")
+    def create_unit(request: Request, unit_in: schemas.UnitCreate, user_id: int = Depends(current_user_id)):
+        prop = data.properties.get(unit_in.property_id)
+        if prop is None or prop["user_id"] != user_id:
+            raise HTTPException(status_code=404, detail="Property not found or access denied")
+        unit = {"id": max(data.units) + 1, **unit_in.dict()}
+        data.units[unit["id"]] = unit
+        data.units_by_property[prop["id"]].append(unit["id"])
+        return _respond(request, schemas.UnitRead(**unit), 201)
+
+    return app
+
+
+def leasing_app(data: Dataset) -> FastAPI:
+    schemas = load_schemas("leasing")
+    app = FastAPI(title="Leasing Service (stub)")
+
+    @app.get("/api/v1/leases/availability/batch")
+    def availability(request: Request, unit_ids: List[int] = Query(...),
+                     date_from: date = Query(..., alias="from"), date_to: date = Query(..., alias="to")):
+        result = []
+        for unit_id in dict.fromkeys(unit_ids):
+            lease = data.active_by_unit.get(unit_id)
+            start = date_from if lease is None else max(date_from, lease["end_date"] + timedelta(days=1))
+            free = [schemas.DateRange(start_date=start, end_date=date_to)] if start <= date_to else []
+            result.append(schemas.UnitAvailability(unit_id=unit_id, free=free))
+        return _respond(request, result)
+
+    @app.post("/api/v1/leases/summary")
+    def summary(request: Request, summary_in: schemas.LeaseSummaryRequest, user_id: int = Depends(current_user_id)):
+        payload = jwt.decode(summary_in.units_token, options={"verify_signature": False})
+        if payload.get("sub") != str(user_id):
+            raise HTTPException(status_code=403, detail="Invalid units token")
+        result = schemas.LeaseSummary()
+        for unit_id in payload.get("unit_ids", []):
+            lease = data.active_by_unit.get(unit_id)
+            if lease is None:
+                continue
+            result.units.append(schemas.UnitLeaseSummary(
+                unit_id=unit_id, active_leases=1,
+                payments_mtd_total=lease["monthly_rent"], payments_mtd_count=1,
+            ))
+            result.active_leases += 1
+            result.payments_mtd_total += lease["monthly_rent"]
+            result.payments_mtd_count += 1
+        return _respond(request, result)
+
+    @app.get("/api/v1/leases/")
+    def list_leases(request: Request, after_id: Optional[int] = None, limit: Optional[int] = None,
+                    user_id: int = Depends(current_user_id)):
+        leases = [data.leases[i] for i in data.leases_by_user.get(user_id, [])]
+        return _respond(request, [schemas.LeaseRead(**lease) for lease in _page(leases, after_id, limit)])
+
+    @app.post("/api/v1/leases/")
+    def create_lease(request: Request, lease_in: schemas.LeaseCreate, user_id: int = Depends(current_user_id)):
+        return _respond(request, schemas.LeaseRead(**data.add_lease(user_id, lease_in.dict())), 201)
+
+    return app
+
+
+APPS = {"auth": auth_app, "property": property_app, "leasing": leasing_app}
+
+
+def build_app(service: str, data: Dataset, latency: Latency, error_rate: float, seed: int) -> FastAPI:
+    app = APPS[service](data)
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok", "stub": True}
+
+    app.add_middleware(FaultMiddleware, latency=latency, error_rate=error_rate,
+                       rng=random.Random(f"{seed}:{service}:faults"))
+    return app
+
+
+def parse_per_service(values: List[str], cast, default):
+    """['lognormal:5:20', 'property=lognormal:20:80'] → {service: value}; без имени — для всех"""
+    result = {service: default for service in SERVICES}
+    named = []
+    for value in values or []:
+        service, sep, spec = value.partition("=")
+        if not sep:
+            result = {s: cast(value) for s in SERVICES}
+        elif service in SERVICES:
+            named.append((service, spec))
+        else:
+            raise ValueError(f"Неизвестный сервис: {service}")
+    for service, spec in named:
+        result[service] = cast(spec)
+    return result
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", action="append", metavar="[SERVICE=]SPEC",
+                        help="распределение задержки, напр. property=lognormal:20:80 (можно несколько)")
+    parser.add_argument("--errors", action="append", metavar="[SERVICE=]RATE",
+                        help="доля ответов 503, напр. leasing=0.02")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--properties", type=int, default=2000)
+    parser.add_argument("--units-per-property", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def build_dataset(args) -> Dataset:
+    return Dataset(args.users, args.properties, args.units_per_property, args.seed)
+
+
+async def serve(args) -> None:
+    import uvicorn
+
+    data = build_dataset(args)
+    latency = parse_per_service(args.latency, Latency, Latency())
+    errors = parse_per_service(args.errors, float, 0.0)
+    servers = []
+    for offset, service in enumerate(SERVICES):
+        if args.service and service != args.service:
+            continue
+        port = args.port + offset
+        app = build_app(service, data, latency[service], errors[service], args.seed)
+        config = uvicorn.Config(app, host=args.host, port=port, log_level="warning", access_log=False)
+        servers.append(uvicorn.Server(config))
+        print(f"{service.upper()}_BASE=http://{args.host}:{port}  "
+              f"latency={latency[service].spec} errors={errors[service]}", flush=True)
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поддельные бэкенды для бенчмарков фронтенда")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001, help="порт auth; property и leasing — следующие")
+    parser.add_argument("--service", choices=SERVICES, help="запустить только один сервис (на его порту)")
+    add_arguments(parser)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,18 @@ CREATE SCHEMA IF NOT EXISTS auth;
 CREATE SCHEMA IF NOT EXISTS property_mgmt;
 CREATE SCHEMA IF NOT EXISTS leasing;
 
+-- btree_gist нужен для GiST-индексов, совмещающих integer и диапазоны дат
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- updated_at — версия строки для ETag/Last-Modified; обновляется триггером
+-- при любом UPDATE, независимо от того, кто пишет в таблицу
+CREATE OR REPLACE FUNCTION public.set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
 -- =========================
 -- 1. AUTH-SERVICE
 -- =========================
@@ -29,6 +41,7 @@ CREATE TABLE property_mgmt.property (
     description TEXT,
     property_type VARCHAR(50) NOT NULL,
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     CONSTRAINT fk_property_user
         FOREIGN KEY (user_id)
         REFERENCES auth.app_user(id)
@@ -44,6 +57,7 @@ CREATE TABLE property_mgmt.unit (
         CHECK (status IN ('AVAILABLE', 'OCCUPIED', 'MAINTENANCE')),
     monthly_rent NUMERIC(12, 2) NOT NULL,
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     CONSTRAINT fk_unit_property
         FOREIGN KEY (property_id)
         REFERENCES property_mgmt.property(id)
@@ -55,6 +69,20 @@ CREATE TABLE property_mgmt.unit (
 CREATE INDEX idx_unit_property_id ON property_mgmt.unit(property_id);
 CREATE INDEX idx_property_user_id ON property_mgmt.property(user_id);
 
+CREATE TRIGGER trg_property_updated_at BEFORE UPDATE ON property_mgmt.property
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER trg_unit_updated_at BEFORE UPDATE ON property_mgmt.unit
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+-- Поиск помещений (GET /api/v1/units/search): фильтр по статусу,
+-- сортировка и keyset-пагинация по (monthly_rent, id)
+CREATE INDEX idx_unit_status_rent ON property_mgmt.unit(status, monthly_rent, id);
+CREATE INDEX idx_unit_status_area ON property_mgmt.unit(status, area);
+CREATE INDEX idx_unit_status_floor_rent ON property_mgmt.unit(status, floor, monthly_rent, id);
+CREATE INDEX idx_unit_available_rent ON property_mgmt.unit(monthly_rent, id)
+    WHERE status = 'AVAILABLE';
+CREATE INDEX idx_property_type ON property_mgmt.property(property_type, id);
+
 -- =========================
 -- 3. LEASING-SERVICE
 -- =========================
@@ -69,6 +97,7 @@ CREATE TABLE leasing.lease (
     status VARCHAR(20) NOT NULL
         CHECK (status IN ('DRAFT', 'ACTIVE', 'COMPLETED', 'CANCELLED')),
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     CONSTRAINT fk_lease_unit
         FOREIGN KEY (unit_id)
         REFERENCES property_mgmt.unit(id),
@@ -77,8 +106,11 @@ CREATE TABLE leasing.lease (
         REFERENCES auth.app_user(id)
 );
 
+-- Платежи секционированы по месяцам payment_date (секции payment_yYYYYmMM
+-- создаёт leasing.ensure_payment_partitions, см. ниже); первичный ключ
+-- секционированной таблицы обязан включать ключ секционирования
 CREATE TABLE leasing.payment (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     lease_id INT NOT NULL,
     payment_date DATE NOT NULL,
     amount NUMERIC(12, 2) NOT NULL,
@@ -86,12 +118,127 @@ CREATE TABLE leasing.payment (
         CHECK (status IN ('PLANNED', 'PAID', 'OVERDUE', 'CANCELLED')),
     method VARCHAR(20), -- cash, card, bank_transfer etc.
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, payment_date),
     CONSTRAINT fk_payment_lease
         FOREIGN KEY (lease_id)
         REFERENCES leasing.lease(id)
         ON DELETE CASCADE
-);
+) PARTITION BY RANGE (payment_date);
+
+-- Платежи за месяцы, для которых секция ещё не создана
+CREATE TABLE leasing.payment_default PARTITION OF leasing.payment DEFAULT;
 
 CREATE INDEX idx_lease_unit_id ON leasing.lease(unit_id);
 CREATE INDEX idx_lease_user_id ON leasing.lease(user_id);
 CREATE INDEX idx_payment_lease_id ON leasing.payment(lease_id);
+
+-- Кандидаты в архив: частичный индекс содержит только закрытые договоры,
+-- которые ещё не перенесены, и после каждого прохода архивации остаётся маленьким
+CREATE INDEX idx_lease_closed ON leasing.lease(id)
+    WHERE status IN ('COMPLETED', 'CANCELLED');
+
+CREATE TRIGGER trg_lease_updated_at BEFORE UPDATE ON leasing.lease
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+CREATE TRIGGER trg_payment_updated_at BEFORE UPDATE ON leasing.payment
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+-- Архив: закрытые (COMPLETED/CANCELLED) договоры старше ARCHIVE_AFTER_MONTHS
+-- и их платежи переносит фоновая задача leasing-service (app/db/maintenance.py).
+-- id сохраняются; индексы рабочих таблиц остаются пропорциональны текущим договорам
+CREATE TABLE leasing.lease_archive (
+    id INT PRIMARY KEY,
+    unit_id INT NOT NULL,
+    user_id INT NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE,
+    monthly_rent NUMERIC(12, 2) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE leasing.payment_archive (
+    id INT PRIMARY KEY,
+    lease_id INT NOT NULL,
+    payment_date DATE NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    method VARCHAR(20),
+    created_at TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT fk_payment_archive_lease
+        FOREIGN KEY (lease_id)
+        REFERENCES leasing.lease_archive(id)
+        ON DELETE CASCADE
+);
+
+CREATE INDEX idx_lease_archive_user_id ON leasing.lease_archive(user_id);
+CREATE INDEX idx_payment_archive_lease_id ON leasing.payment_archive(lease_id);
+
+-- Ключи Idempotency-Key для POST /leases/ и /payments/ (app/core/idempotency.py):
+-- хэш тела запроса и сохранённый ответ. Строки старше IDEMPOTENCY_TTL_HOURS
+-- удаляет фоновая задача; вставки идут по времени, поэтому индексу по
+-- created_at достаточно BRIN
+CREATE TABLE leasing.idempotency (
+    user_id INT NOT NULL,
+    key VARCHAR(100) NOT NULL,
+    request_hash BYTEA NOT NULL,
+    status_code SMALLINT,
+    response JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX idx_idempotency_created_at ON leasing.idempotency USING brin (created_at);
+
+-- Месячные секции платежей за период [p_from, p_to]. Строки секции по
+-- умолчанию, попадающие в новый месяц, переносятся в созданную секцию.
+-- Вызывается при инициализации, фоновой задачей leasing-service и scripts/seed.py
+CREATE OR REPLACE FUNCTION leasing.ensure_payment_partitions(p_from DATE, p_to DATE)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    month_end DATE;
+    part_name TEXT;
+    created INT := 0;
+BEGIN
+    -- несколько экземпляров сервиса не создают одну секцию одновременно
+    PERFORM pg_advisory_xact_lock(hashtext('leasing.ensure_payment_partitions'));
+    WHILE month_start <= p_to LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        part_name := 'payment_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM');
+        IF to_regclass('leasing.' || part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE leasing.%I (LIKE leasing.payment INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                part_name
+            );
+            -- до переноса строк: платёж за этот месяц, вставленный между
+            -- DELETE и ATTACH, остался бы в секции по умолчанию, и ATTACH упал бы
+            LOCK TABLE leasing.payment_default IN ACCESS EXCLUSIVE MODE;
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM leasing.payment_default '
+                'WHERE payment_date >= %L AND payment_date < %L RETURNING *) '
+                'INSERT INTO leasing.%I SELECT * FROM moved',
+                month_start, month_end, part_name
+            );
+            EXECUTE format(
+                'ALTER TABLE leasing.payment ATTACH PARTITION leasing.%I FOR VALUES FROM (%L) TO (%L)',
+                part_name, month_start, month_end
+            );
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT leasing.ensure_payment_partitions(CURRENT_DATE, (CURRENT_DATE + INTERVAL '3 months')::date);
+
+-- Календарь занятости: пересечение периодов действующих договоров
+CREATE INDEX idx_lease_active_period ON leasing.lease
+    USING gist (unit_id, daterange(start_date, end_date, '[]'))
+    WHERE status = 'ACTIVE';
@@ -0,0 +1,13 @@
+-- Миграция: таблица ключей Idempotency-Key leasing-service
+
+CREATE TABLE IF NOT EXISTS leasing.idempotency (
+    user_id INT NOT NULL,
+    key VARCHAR(100) NOT NULL,
+    request_hash BYTEA NOT NULL,
+    status_code SMALLINT,
+    response JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_created_at ON leasing.idempotency USING brin (created_at);
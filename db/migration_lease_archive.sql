@@ -0,0 +1,39 @@
+-- Миграция: архивные таблицы договоров и платежей
+-- Перенос строк выполняет leasing-service (ARCHIVE_AFTER_MONTHS, ARCHIVE_BATCH_SIZE)
+
+CREATE TABLE IF NOT EXISTS leasing.lease_archive (
+    id INT PRIMARY KEY,
+    unit_id INT NOT NULL,
+    user_id INT NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE,
+    monthly_rent NUMERIC(12, 2) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS leasing.payment_archive (
+    id INT PRIMARY KEY,
+    lease_id INT NOT NULL,
+    payment_date DATE NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    method VARCHAR(20),
+    created_at TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT fk_payment_archive_lease
+        FOREIGN KEY (lease_id)
+        REFERENCES leasing.lease_archive(id)
+        ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_lease_archive_user_id ON leasing.lease_archive(user_id);
+CREATE INDEX IF NOT EXISTS idx_payment_archive_lease_id ON leasing.payment_archive(lease_id);
+
+-- Кандидаты в архив: частичный индекс содержит только закрытые договоры,
+-- которые ещё не перенесены, и после каждого прохода архивации остаётся маленьким
+CREATE INDEX IF NOT EXISTS idx_lease_closed ON leasing.lease(id)
+    WHERE status IN ('COMPLETED', 'CANCELLED');
@@ -0,0 +1,8 @@
+-- Миграция: GiST-индекс по периодам действующих договоров
+-- Нужен для GET /api/v1/leases/availability (свободные интервалы помещений)
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+CREATE INDEX IF NOT EXISTS idx_lease_active_period ON leasing.lease
+    USING gist (unit_id, daterange(start_date, end_date, '[]'))
+    WHERE status = 'ACTIVE';
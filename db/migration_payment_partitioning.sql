@@ -0,0 +1,94 @@
+-- Миграция: секционирование leasing.payment по месяцам payment_date
+-- Таблица пересоздаётся как секционированная, данные копируются в месячные
+-- секции; id сохраняются, последовательность переходит к новой таблице.
+-- Выполняется одной транзакцией: на время копирования запись в платежи
+-- заблокирована, для больших таблиц запускайте в окно обслуживания.
+
+BEGIN;
+
+ALTER TABLE leasing.payment RENAME TO payment_unpartitioned;
+ALTER INDEX leasing.payment_pkey RENAME TO payment_unpartitioned_pkey;
+ALTER INDEX leasing.idx_payment_lease_id RENAME TO idx_payment_unpartitioned_lease_id;
+DROP TRIGGER IF EXISTS trg_payment_updated_at ON leasing.payment_unpartitioned;
+
+CREATE TABLE leasing.payment (
+    id INT NOT NULL DEFAULT nextval('leasing.payment_id_seq'),
+    lease_id INT NOT NULL,
+    payment_date DATE NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    status VARCHAR(20) NOT NULL
+        CHECK (status IN ('PLANNED', 'PAID', 'OVERDUE', 'CANCELLED')),
+    method VARCHAR(20),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, payment_date),
+    CONSTRAINT fk_payment_lease
+        FOREIGN KEY (lease_id)
+        REFERENCES leasing.lease(id)
+        ON DELETE CASCADE
+) PARTITION BY RANGE (payment_date);
+
+ALTER SEQUENCE leasing.payment_id_seq OWNED BY leasing.payment.id;
+
+CREATE TABLE leasing.payment_default PARTITION OF leasing.payment DEFAULT;
+CREATE INDEX idx_payment_lease_id ON leasing.payment(lease_id);
+CREATE TRIGGER trg_payment_updated_at BEFORE UPDATE ON leasing.payment
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+CREATE OR REPLACE FUNCTION leasing.ensure_payment_partitions(p_from DATE, p_to DATE)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    month_end DATE;
+    part_name TEXT;
+    created INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('leasing.ensure_payment_partitions'));
+    WHILE month_start <= p_to LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        part_name := 'payment_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM');
+        IF to_regclass('leasing.' || part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE leasing.%I (LIKE leasing.payment INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                part_name
+            );
+            -- до переноса строк: платёж за этот месяц, вставленный между
+            -- DELETE и ATTACH, остался бы в секции по умолчанию, и ATTACH упал бы
+            LOCK TABLE leasing.payment_default IN ACCESS EXCLUSIVE MODE;
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM leasing.payment_default '
+                'WHERE payment_date >= %L AND payment_date < %L RETURNING *) '
+                'INSERT INTO leasing.%I SELECT * FROM moved',
+                month_start, month_end, part_name
+            );
+            EXECUTE format(
+                'ALTER TABLE leasing.payment ATTACH PARTITION leasing.%I FOR VALUES FROM (%L) TO (%L)',
+                part_name, month_start, month_end
+            );
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Секции на всю историю и три месяца вперёд — до копирования, чтобы строки
+-- сразу попали в свои секции, а не в секцию по умолчанию
+SELECT leasing.ensure_payment_partitions(
+    COALESCE((SELECT min(payment_date) FROM leasing.payment_unpartitioned), CURRENT_DATE),
+    (GREATEST(
+        CURRENT_DATE,
+        COALESCE((SELECT max(payment_date) FROM leasing.payment_unpartitioned), CURRENT_DATE)
+    ) + INTERVAL '3 months')::date
+);
+
+INSERT INTO leasing.payment (id, lease_id, payment_date, amount, status, method, created_at, updated_at)
+SELECT id, lease_id, payment_date, amount, status, method, created_at, updated_at
+FROM leasing.payment_unpartitioned;
+
+DROP TABLE leasing.payment_unpartitioned;
+
+ANALYZE leasing.payment;
+
+COMMIT;
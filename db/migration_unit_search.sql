@@ -0,0 +1,18 @@
+-- Миграция: индексы для поиска помещений (GET /api/v1/units/search)
+-- Фильтр по статусу + сортировка и keyset-пагинация по (monthly_rent, id)
+
+CREATE INDEX IF NOT EXISTS idx_unit_status_rent
+    ON property_mgmt.unit(status, monthly_rent, id);
+
+CREATE INDEX IF NOT EXISTS idx_unit_status_area
+    ON property_mgmt.unit(status, area);
+
+CREATE INDEX IF NOT EXISTS idx_unit_status_floor_rent
+    ON property_mgmt.unit(status, floor, monthly_rent, id);
+
+CREATE INDEX IF NOT EXISTS idx_unit_available_rent
+    ON property_mgmt.unit(monthly_rent, id)
+    WHERE status = 'AVAILABLE';
+
+CREATE INDEX IF NOT EXISTS idx_property_type
+    ON property_mgmt.property(property_type, id);
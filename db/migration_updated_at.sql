@@ -0,0 +1,34 @@
+-- Миграция: колонки updated_at (версия строки для ETag/Last-Modified)
+-- Существующие строки получают время выполнения миграции
+
+CREATE OR REPLACE FUNCTION public.set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE property_mgmt.property
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+ALTER TABLE property_mgmt.unit
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+ALTER TABLE leasing.lease
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+ALTER TABLE leasing.payment
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS trg_property_updated_at ON property_mgmt.property;
+CREATE TRIGGER trg_property_updated_at BEFORE UPDATE ON property_mgmt.property
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+DROP TRIGGER IF EXISTS trg_unit_updated_at ON property_mgmt.unit;
+CREATE TRIGGER trg_unit_updated_at BEFORE UPDATE ON property_mgmt.unit
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+DROP TRIGGER IF EXISTS trg_lease_updated_at ON leasing.lease;
+CREATE TRIGGER trg_lease_updated_at BEFORE UPDATE ON leasing.lease
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+
+DROP TRIGGER IF EXISTS trg_payment_updated_at ON leasing.payment;
+CREATE TRIGGER trg_payment_updated_at BEFORE UPDATE ON leasing.payment
+    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
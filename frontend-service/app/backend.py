@@ -0,0 +1,117 @@
+"""
+Общий HTTP-клиент для обращений к микросервисам.
+
+Все обработчики получают клиента через backend_client(): соединения берутся
+из одного пула, а GET-ответы с ETag запоминаются и перепроверяются
+условным запросом (If-None-Match). На 304 обработчик получает сохранённое
+тело как обычный ответ 200. Под кэшем работает ResilientTransport
+(предохранители, повторы, hedging — см. app/resilience.py), под ним —
+DeadlineTransport (бюджет времени страницы, см. app/deadline.py),
+TracingTransport (span и traceparent, см. app/tracing.py) и
+MetricsTransport (латентность каждой попытки, см. app/metrics.py).
+"""
+import hashlib
+import os
+from typing import NamedTuple
+
+import httpx
+
+from app.cache import TTLCache
+from app.deadline import DeadlineTransport
+from app.metrics import MetricsTransport
+from app.tracing import TracingTransport
+from app.resilience import ResilientTransport
+
+ETAG_CACHE_SIZE = int(os.getenv("ETAG_CACHE_SIZE", "5000"))
+ETAG_CACHE_TTL = int(os.getenv("ETAG_CACHE_TTL", "3600"))
+# Объём кэша ограничен суммой размеров тел, а не только числом записей:
+# несколько больших ответов не вытесняют остальной кэш и не раздувают воркер
+ETAG_CACHE_MAX_BYTES = int(os.getenv("ETAG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ETAG_CACHE_MAX_BODY = int(os.getenv("ETAG_CACHE_MAX_BODY", str(256 * 1024)))
+
+
+class _StoredResponse(NamedTuple):
+    etag: str
+    headers: list
+    content: bytes
+
+
+class ETagCacheTransport(httpx.AsyncBaseTransport):
+    """Транспорт, перепроверяющий сохранённые GET-ответы по ETag"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: TTLCache):
+        self._transport = transport
+        self._cache = cache
+
+    @staticmethod
+    def _key(request: httpx.Request) -> tuple:
+        # Ответы персональные, поэтому ключ включает (хэш) токена
+        auth = request.headers.get("authorization", "")
+        return str(request.url), hashlib.sha1(auth.encode()).hexdigest()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return await self._transport.handle_async_request(request)
+
+        key = self._key(request)
+        stored = self._cache.get(key)
+        if stored is not None and "if-none-match" not in request.headers:
+            request.headers["If-None-Match"] = stored.etag
+
+        response = await self._transport.handle_async_request(request)
+
+        if response.status_code == 304 and stored is not None:
+            await response.aclose()
+            return httpx.Response(
+                200,
+                headers=stored.headers,
+                content=stored.content,
+                request=request,
+                extensions={"etag_revalidated": True},
+            )
+
+        etag = response.headers.get("etag")
+        if response.status_code != 200 or not etag:
+            return response
+
+        # Тело читается «как есть» (без декодирования Content-Encoding),
+        # чтобы сохранённые заголовки соответствовали сохранённым байтам
+        content = b"".join([chunk async for chunk in response.stream])
+        await response.aclose()
+        if len(content) <= ETAG_CACHE_MAX_BODY:
+            self._cache.set(key, _StoredResponse(etag, response.headers.multi_items(), content))
+        return httpx.Response(
+            200,
+            headers=response.headers,
+            content=content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        # Транспорт общий для всех клиентов: закрывается только при остановке приложения
+        pass
+
+
+etag_cache = TTLCache(
+    maxsize=ETAG_CACHE_SIZE,
+    ttl=ETAG_CACHE_TTL,
+    maxbytes=ETAG_CACHE_MAX_BYTES,
+    sizeof=lambda stored: len(stored.content),
+)
+_pool = httpx.AsyncHTTPTransport(
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+)
+resilience = ResilientTransport(
+    DeadlineTransport(TracingTransport(MetricsTransport(_pool)))
+)
+transport = ETagCacheTransport(resilience, etag_cache)
+
+
+def backend_client(**kwargs) -> httpx.AsyncClient:
+    """Клиент для обращений к микросервисам поверх общего пула соединений"""
+    return httpx.AsyncClient(transport=transport, **kwargs)
+
+
+async def close_backend_transport() -> None:
+    await _pool.aclose()
@@ -0,0 +1,214 @@
+"""
+Сжатие ответов: gzip и br (если установлен пакет brotli).
+
+CompressionMiddleware сжимает ответ, когда клиент принимает подходящую
+кодировку (Accept-Encoding с учётом q), тип содержимого входит в список
+content_types, а тело не меньше minimum_size байт. Не трогает ответы, у
+которых уже есть Content-Encoding или Cache-Control: no-transform.
+
+Потоковые ответы (несколько http.response.body) сжимаются по частям с
+flush после каждой части, поэтому клиент получает начало страницы так же
+рано, как без сжатия. У сжатого ответа сильный ETag становится слабым
+(байты представления другие), добавляется Vary: Accept-Encoding.
+Объём до и после сжатия — в метриках http_compression_*_bytes.
+
+Настройки — переменные окружения COMPRESSION_*; кэш страниц
+(app/page_cache.py) по ним же хранит уже сжатые варианты страниц.
+"""
+import os
+import zlib
+from typing import Iterable, Optional
+
+from app.metrics import COMPRESSED_RESPONSES, COMPRESSION_INPUT, COMPRESSION_OUTPUT
+
+try:
+    import brotli
+except ImportError:  # br не предлагается, остаётся gzip
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = (
+    "application/json",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+)
+
+
+def parse_content_types(value: str) -> tuple:
+    return tuple(item.strip().lower() for item in value.split(",") if item.strip())
+
+
+# Сжатие HTML и JSON для браузеров
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_TYPES = parse_content_types(os.getenv("COMPRESSION_TYPES", ",".join(DEFAULT_CONTENT_TYPES)))
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._brotli = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._brotli.process(data)
+        return out + (self._brotli.finish() if final else self._brotli.flush())
+
+
+def compress(
+    body: bytes,
+    encoding: str,
+    level: int = COMPRESSION_LEVEL,
+    brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+) -> bytes:
+    """Сжать тело целиком (для заранее сжатых вариантов, см. app/page_cache.py)"""
+    compressor = _Brotli(brotli_quality) if encoding == "br" else _Gzip(level)
+    return compressor.compress(body, final=True)
+
+
+def choose_encoding(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """Кодировка с наибольшим q; при равенстве — первая из available"""
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for name in available:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI-middleware: сжатие ответов по Accept-Encoding"""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        level: int = 6,
+        brotli_quality: int = 4,
+        content_types: Iterable[str] = DEFAULT_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.content_types = frozenset(content_types)
+        self.encodings = ENCODINGS
+
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _Brotli(self.brotli_quality)
+        return _Gzip(self.level)
+
+    def _compressible(self, start: dict) -> bool:
+        if not 200 <= start["status"] < 300 or start["status"] == 204:
+            return False
+        headers = {key.lower(): value for key, value in start["headers"]}
+        if b"content-encoding" in headers:
+            return False
+        if b"no-transform" in headers.get(b"cache-control", b"").lower():
+            return False
+        content_type = headers.get(b"content-type", b"").split(b";")[0].strip().lower()
+        return content_type.decode("latin-1") in self.content_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        encoding = choose_encoding(
+            request_headers.get(b"accept-encoding", b"").decode("latin-1"), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Заголовки отправляются вместе с первой частью тела:
+                # только тогда известно, сжимать ли ответ
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not self._compressible(start) or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = self._compressor(encoding)
+                compressed = compressor.compress(body, final=not more_body)
+                if not more_body and len(compressed) >= len(body):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                start["headers"] = self._compressed_headers(start["headers"], encoding, compressed, more_body)
+                COMPRESSED_RESPONSES.labels(encoding).inc()
+                await send(start)
+            else:
+                compressed = compressor.compress(body, final=not more_body)
+
+            COMPRESSION_INPUT.labels(encoding).inc(len(body))
+            COMPRESSION_OUTPUT.labels(encoding).inc(len(compressed))
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressed_headers(headers, encoding: str, compressed: bytes, streaming: bool) -> list:
+        result = []
+        vary = []
+        for key, value in headers:
+            name = key.lower()
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary.append(value)
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            result.append((key, value))
+        if not any(b"accept-encoding" in value.lower() or value.strip() == b"*" for value in vary):
+            vary.append(b"Accept-Encoding")
+        result.append((b"vary", b", ".join(vary)))
+        result.append((b"content-encoding", encoding.encode()))
+        if not streaming:
+            result.append((b"content-length", str(len(compressed)).encode()))
+        return result
@@ -0,0 +1,86 @@
+"""
+Бюджет времени запроса к фронтенду.
+
+DeadlineMiddleware назначает каждому запросу дедлайн по бюджету маршрута.
+DeadlineTransport (нижний слой клиента микросервисов) передаёт остаток
+бюджета в заголовке X-Request-Timeout-Ms и ограничивает им таймауты httpx,
+поэтому ни один вызов не ждёт дольше, чем осталось у страницы, а бэкенды
+прекращают работу, результат которой уже никому не нужен.
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+# Бэкенд ответил 504, потому что исчерпан переданный ему бюджет, а не из-за сбоя
+EXCEEDED_HEADER = "X-Deadline-Exceeded"
+
+REQUEST_BUDGET_SECONDS = float(os.getenv("REQUEST_BUDGET_SECONDS", "8"))
+# Бюджеты отдельных маршрутов (префикс пути -> секунды), первое совпадение
+ROUTE_BUDGETS = [
+    ("/catalog/suggest", 1.0),
+    ("/health", 1.0),
+]
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Бюджет времени страницы исчерпан до отправки запроса к бэкенду"""
+
+
+def route_budget(path: str) -> float:
+    for prefix, seconds in ROUTE_BUDGETS:
+        if path.startswith(prefix):
+            return seconds
+    return REQUEST_BUDGET_SECONDS
+
+
+def remaining_seconds() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class DeadlineMiddleware:
+    """ASGI-middleware: дедлайн запроса по бюджету маршрута"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _deadline.set(time.monotonic() + route_budget(scope["path"]))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
+
+
+class DeadlineTransport(httpx.AsyncBaseTransport):
+    """Передаёт остаток бюджета бэкенду и ограничивает им таймауты запроса"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        remaining = remaining_seconds()
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceeded("Request deadline exceeded", request=request)
+            request.headers[DEADLINE_HEADER] = str(int(remaining * 1000))
+            timeout = request.extensions.get("timeout", {})
+            request.extensions["timeout"] = {
+                key: remaining if value is None else min(value, remaining)
+                for key, value in timeout.items()
+            }
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
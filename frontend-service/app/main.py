@@ -1,21 +1,55 @@
+import time
+
+STARTED_AT = time.perf_counter()
+
+import asyncio
+import logging
 import os
+import uuid
+from datetime import date, timedelta
 
 from fastapi import FastAPI, Request, Form, Depends, Query
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 import httpx
 import jwt
 
+from app.backend import backend_client, close_backend_transport, etag_cache, resilience
+from app.cache import TTLCache
+from app.compression import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_ENABLED,
+    COMPRESSION_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_TYPES,
+    CompressionMiddleware,
+)
+from app.deadline import DeadlineMiddleware
+from app.metrics import MetricsMiddleware, metrics_response, register_caches, register_resilience
+from app.page_cache import cached_page, mark_degraded, page_cache
+from app.streaming import LIST_PAGE_SIZE, StreamState, paginate, paginate_pages, render_stream
+from app.templating import templates, precompile_templates
+from app.tracing import TracingMiddleware
+
 # Базовые URL микросервисов
 AUTH_BASE = os.getenv("AUTH_BASE", "http://auth_service:8001")
 PROPERTY_BASE = os.getenv("PROPERTY_BASE", "http://property_service:8002")
 LEASING_BASE = os.getenv("LEASING_BASE", "http://leasing_service:8003")
 
-app = FastAPI(title="Rental Frontend")
+# Горизонт календаря свободных дат в каталоге
+AVAILABILITY_DAYS = int(os.getenv("AVAILABILITY_DAYS", "90"))
+
+# Сколько запросов за деталями договоров выполняется одновременно
+LEASE_DETAILS_CONCURRENCY = int(os.getenv("LEASE_DETAILS_CONCURRENCY", "10"))
 
-templates = Jinja2Templates(directory="app/templates")
+# Подсказки для фильтров каталога кэшируются и на фронтенде, и в браузере
+SUGGEST_CACHE_TTL = int(os.getenv("SUGGEST_CACHE_TTL", "300"))
+suggest_cache = TTLCache(maxsize=10_000, ttl=SUGGEST_CACHE_TTL)
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Rental Frontend")
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +61,53 @@ app.add_middleware(
 
 app.add_middleware(SessionMiddleware, secret_key="supersecret_frontend_key")
 
+app.add_middleware(DeadlineMiddleware)
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        level=COMPRESSION_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+        content_types=COMPRESSION_TYPES,
+    )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
+register_caches(page=page_cache, etag=etag_cache, suggest=suggest_cache)
+register_resilience(resilience)
+
+
+@app.on_event("startup")
+async def warm_up():
+    report = precompile_templates()
+    report["startup_ms"] = round((time.perf_counter() - STARTED_AT) * 1000, 3)
+    app.state.startup_report = report
+    logger.info("Frontend ready in %.1f ms", report["startup_ms"])
+
+
+@app.on_event("shutdown")
+async def shutdown_backend_transport():
+    await close_backend_transport()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "startup": getattr(app.state, "startup_report", None),
+        "backends": resilience.stats(),
+    }
+
+
+def new_idempotency_key() -> str:
+    """Ключ Idempotency-Key для скрытого поля формы создания"""
+    return uuid.uuid4().hex
+
 
 def get_token_from_cookies(request: Request) -> str | None:
     return request.cookies.get("access_token")
@@ -72,7 +153,7 @@ async def login(
     password: str = Form(...),
     redirect: str | None = Form(None),
 ):
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp = await client.post(
                 f"{AUTH_BASE}/api/v1/auth/login",
@@ -137,11 +218,12 @@ async def properties_list(request: Request):
 
     headers = {"Authorization": f"Bearer {token}"}
 
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp = await client.get(
                 f"{PROPERTY_BASE}/api/v1/properties/",
                 headers=headers,
+                params={"limit": LIST_PAGE_SIZE},
                 timeout=10.0,
             )
         except httpx.RequestError:
@@ -171,17 +253,83 @@ async def properties_list(request: Request):
             status_code=resp.status_code,
         )
 
-    properties = resp.json()
-    return templates.TemplateResponse(
+    stream = StreamState()
+    return render_stream(
         "properties.html",
         {
             "request": request,
-            "properties": properties,
+            "properties": paginate(
+                f"{PROPERTY_BASE}/api/v1/properties/", resp.json(), stream, headers=headers,
+            ),
+            "stream": stream,
             "error": None,
         },
     )
 
 
+@app.get("/dashboard", response_class=HTMLResponse)
+async def dashboard(request: Request):
+    """
+    Сводка по портфелю владельца: два запроса к бэкендам независимо от числа
+    объектов — агрегат property-service и сводка leasing-service по
+    подписанному списку помещений из первого ответа.
+    """
+    token = get_token_from_cookies(request)
+    if not token:
+        return RedirectResponse(url="/login?redirect=/dashboard")
+
+    headers = {"Authorization": f"Bearer {token}"}
+    context = {"request": request, "dashboard": None, "summary": None, "error": None}
+
+    async with backend_client() as client:
+        try:
+            resp = await client.get(
+                f"{PROPERTY_BASE}/api/v1/properties/dashboard",
+                headers=headers,
+                timeout=10.0,
+            )
+        except httpx.RequestError:
+            context["error"] = "Сервис объектов недоступен"
+            return templates.TemplateResponse("dashboard.html", context, status_code=503)
+
+        if resp.status_code == 401:
+            response = RedirectResponse(url="/login?redirect=/dashboard", status_code=303)
+            response.delete_cookie("access_token")
+            return response
+
+        if resp.status_code != 200:
+            context["error"] = f"Ошибка сервиса объектов: {resp.status_code}"
+            return templates.TemplateResponse("dashboard.html", context, status_code=resp.status_code)
+
+        context["dashboard"] = resp.json()
+
+        # Без сводки по договорам страница всё равно полезна — показываем объекты
+        try:
+            summary_resp = await client.post(
+                f"{LEASING_BASE}/api/v1/leases/summary",
+                headers=headers,
+                json={"units_token": context["dashboard"]["units_token"]},
+                timeout=10.0,
+            )
+            if summary_resp.status_code == 200:
+                context["summary"] = summary_resp.json()
+            else:
+                context["error"] = f"Ошибка сервиса договоров: {summary_resp.status_code}"
+        except httpx.RequestError:
+            context["error"] = "Сервис договоров недоступен"
+
+    by_unit = {
+        item["unit_id"]: item
+        for item in (context["summary"] or {}).get("units", [])
+    }
+    for prop in context["dashboard"]["properties"]:
+        units = [by_unit[unit_id] for unit_id in prop["unit_ids"] if unit_id in by_unit]
+        prop["active_leases"] = sum(u["active_leases"] for u in units)
+        prop["payments_mtd_total"] = sum(u["payments_mtd_total"] for u in units)
+
+    return templates.TemplateResponse("dashboard.html", context)
+
+
 @app.get("/properties/new", response_class=HTMLResponse)
 async def property_new_form(request: Request):
     token = get_token_from_cookies(request)
@@ -214,7 +362,7 @@ async def property_create(
         "property_type": property_type,
     }
 
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp = await client.post(
                 f"{PROPERTY_BASE}/api/v1/properties/",
@@ -257,12 +405,12 @@ async def units_list(
 
     headers = {"Authorization": f"Bearer {token}"}
 
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp_units = await client.get(
                 f"{PROPERTY_BASE}/api/v1/units/",
                 headers=headers,
-                params={"property_id": property_id},
+                params={"property_id": property_id, "limit": LIST_PAGE_SIZE},
                 timeout=10.0,
             )
         except httpx.RequestError:
@@ -296,14 +444,22 @@ async def units_list(
             status_code=resp_units.status_code,
         )
 
-    units = resp_units.json()
-    return templates.TemplateResponse(
+    stream = StreamState()
+    units = paginate(
+        f"{PROPERTY_BASE}/api/v1/units/",
+        resp_units.json(),
+        stream,
+        headers=headers,
+        params={"property_id": property_id},
+    )
+    return render_stream(
         "units.html",
         {
             "request": request,
             "property_id": property_id,
             "property_name": property_name,
             "units": units,
+            "stream": stream,
             "error": None,
         },
     )
@@ -346,7 +502,7 @@ async def unit_create(
     headers = {"Authorization": f"Bearer {token}"}
 
     # 1) Получаем существующие помещения объекта, чтобы придумать следующий номер
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp_units = await client.get(
                 f"{PROPERTY_BASE}/api/v1/units/",
@@ -392,7 +548,7 @@ async def unit_create(
         "monthly_rent": monthly_rent,
     }
 
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp = await client.post(
                 f"{PROPERTY_BASE}/api/v1/units/",
@@ -436,11 +592,12 @@ async def leases_list(request: Request):
 
     headers = {"Authorization": f"Bearer {token}"}
 
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp = await client.get(
                 f"{LEASING_BASE}/api/v1/leases/",
                 headers=headers,
+                params={"limit": LIST_PAGE_SIZE},
                 timeout=10.0,
             )
         except httpx.RequestError:
@@ -470,66 +627,65 @@ async def leases_list(request: Request):
                 status_code=resp.status_code,
             )
 
-        leases = resp.json()
-        unit_cache: dict[int, dict | None] = {}
-        property_cache: dict[int, dict | None] = {}
-        leases_with_details = []
+    stream = StreamState()
+    leases = _leases_with_details(
+        paginate_pages(f"{LEASING_BASE}/api/v1/leases/", resp.json(), stream, headers=headers)
+    )
+    return render_stream(
+        "leases.html",
+        {
+            "request": request,
+            "leases": leases,
+            "stream": stream,
+            "error": None,
+        },
+    )
 
-        for lease in leases:
-            unit_id = lease.get("unit_id")
-            unit_info = unit_cache.get(unit_id)
 
-            if unit_info is None and unit_id is not None:
+async def _leases_with_details(pages):
+    """
+    Дополняет договоры данными помещения и объекта. Детали каждой страницы
+    запрашиваются параллельно, повторные id берутся из кэша запроса.
+    """
+    unit_cache: dict[int, dict | None] = {}
+    property_cache: dict[int, dict | None] = {}
+    semaphore = asyncio.Semaphore(LEASE_DETAILS_CONCURRENCY)
+
+    async with backend_client() as client:
+
+        async def fetch(url: str) -> dict | None:
+            async with semaphore:
                 try:
-                    unit_resp = await client.get(
-                        f"{PROPERTY_BASE}/api/v1/units/public/{unit_id}",
-                        timeout=10.0,
-                    )
-                    if unit_resp.status_code == 200:
-                        unit_info = unit_resp.json()
-                    else:
-                        unit_info = None
+                    resp = await client.get(url, timeout=10.0)
                 except httpx.RequestError:
-                    unit_info = None
-
-                unit_cache[unit_id] = unit_info
-
-            property_info = None
-            if unit_info:
-                property_id = unit_info.get("property_id")
-                property_info = property_cache.get(property_id)
-
-                if property_info is None and property_id is not None:
-                    try:
-                        property_resp = await client.get(
-                            f"{PROPERTY_BASE}/api/v1/properties/{property_id}",
-                            timeout=10.0,
-                        )
-                        if property_resp.status_code == 200:
-                            property_info = property_resp.json()
-                        else:
-                            property_info = None
-                    except httpx.RequestError:
-                        property_info = None
-
-                    property_cache[property_id] = property_info
-
-            leases_with_details.append(
-                {
+                    return None
+            return resp.json() if resp.status_code == 200 else None
+
+        async def load(cache: dict, ids: set, url: str) -> None:
+            ids = [i for i in ids if i is not None and i not in cache]
+            results = await asyncio.gather(*(fetch(url.format(i)) for i in ids))
+            cache.update(zip(ids, results))
+
+        async for page in pages:
+            await load(
+                unit_cache,
+                {lease.get("unit_id") for lease in page},
+                f"{PROPERTY_BASE}/api/v1/units/public/{{}}",
+            )
+            await load(
+                property_cache,
+                {unit["property_id"] for unit in unit_cache.values() if unit},
+                f"{PROPERTY_BASE}/api/v1/properties/{{}}",
+            )
+
+            for lease in page:
+                unit_info = unit_cache.get(lease.get("unit_id"))
+                property_info = property_cache.get(unit_info.get("property_id")) if unit_info else None
+                yield {
                     "lease": lease,
                     "unit": unit_info,
                     "property": property_info,
                 }
-            )
-
-    return templates.TemplateResponse(
-        "leases.html",
-        {
-            "request": request,
-            "leases": leases_with_details,
-            "error": None,
-        },
-    )
 
 
 @app.get("/leases/new", response_class=HTMLResponse)
@@ -543,10 +699,14 @@ async def lease_new_form(
     if not token:
         return RedirectResponse(url="/login")
 
+    # Ключ повтора: повторная отправка формы не создаст второй договор
+    idempotency_key = new_idempotency_key()
+
     return templates.TemplateResponse(
         "lease_form.html",
         {
             "request": request,
+            "idempotency_key": idempotency_key,
             "unit_id": unit_id,
             "property_id": property_id,
             "property_name": property_name,
@@ -566,12 +726,15 @@ async def lease_create(
     end_date: str | None = Form(None),
     monthly_rent: float = Form(...),
     status: str = Form("ACTIVE"),
+    idempotency_key: str | None = Form(None),
 ):
     token = get_token_from_cookies(request)
     if not token:
         return RedirectResponse(url="/login")
 
-    headers = {"Authorization": f"Bearer {token}"}
+    idempotency_key = idempotency_key or new_idempotency_key()
+
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": idempotency_key}
     json_data = {
         "unit_id": unit_id,
         "start_date": start_date,
@@ -580,7 +743,7 @@ async def lease_create(
         "status": status,
     }
 
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp = await client.post(
                 f"{LEASING_BASE}/api/v1/leases/",
@@ -593,6 +756,7 @@ async def lease_create(
                 "lease_form.html",
                 {
                     "request": request,
+                    "idempotency_key": idempotency_key,
                     "unit_id": unit_id,
                     "property_id": property_id,
                     "property_name": None,
@@ -606,6 +770,7 @@ async def lease_create(
             "lease_form.html",
             {
                 "request": request,
+                "idempotency_key": idempotency_key,
                 "unit_id": unit_id,
                 "property_id": property_id,
                 "property_name": None,
@@ -622,6 +787,7 @@ async def lease_create(
 
 # Публичный каталог объектов
 @app.get("/catalog", response_class=HTMLResponse)
+@cached_page
 async def catalog_list(
     request: Request,
     name: str | None = Query(None),
@@ -634,11 +800,11 @@ async def catalog_list(
     if address:
         params["address"] = address
     
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp = await client.get(
                 f"{PROPERTY_BASE}/api/v1/properties/public",
-                params=params,
+                params={**params, "limit": LIST_PAGE_SIZE},
                 timeout=10.0,
             )
         except httpx.RequestError:
@@ -667,12 +833,16 @@ async def catalog_list(
             status_code=resp.status_code,
         )
     
-    properties = resp.json()
-    return templates.TemplateResponse(
+    stream = StreamState()
+    properties = paginate(
+        f"{PROPERTY_BASE}/api/v1/properties/public", resp.json(), stream, params=params,
+    )
+    return render_stream(
         "catalog.html",
         {
             "request": request,
             "properties": properties,
+            "stream": stream,
             "error": None,
             "name": name or "",
             "address": address or "",
@@ -680,13 +850,45 @@ async def catalog_list(
     )
 
 
+@app.get("/catalog/suggest")
+async def catalog_suggest(
+    q: str = Query("", max_length=100),
+    field: str = Query("name", pattern="^(name|address)$"),
+):
+    """Прокси подсказок для формы каталога с кэшированием"""
+    q = q.strip().lower()
+    cache_headers = {"Cache-Control": f"public, max-age={SUGGEST_CACHE_TTL}"}
+    if not q:
+        return JSONResponse([], headers=cache_headers)
+
+    key = (field, q)
+    suggestions = suggest_cache.get(key)
+    if suggestions is None:
+        async with backend_client() as client:
+            try:
+                resp = await client.get(
+                    f"{PROPERTY_BASE}/api/v1/properties/suggest",
+                    params={"q": q, "field": field},
+                    timeout=2.0,
+                )
+            except httpx.RequestError:
+                return JSONResponse([], status_code=503)
+        if resp.status_code != 200:
+            return JSONResponse([], status_code=resp.status_code)
+        suggestions = resp.json()
+        suggest_cache.set(key, suggestions)
+
+    return JSONResponse(suggestions, headers=cache_headers)
+
+
 @app.get("/catalog/{property_id}", response_class=HTMLResponse)
+@cached_page
 async def catalog_property_detail(
     request: Request,
     property_id: int,
 ):
     """Публичная страница объекта с помещениями"""
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         # Получаем информацию об объекте
         try:
             resp_property = await client.get(
@@ -738,17 +940,49 @@ async def catalog_property_detail(
                 status_code=503,
             )
         
-        units = resp_units.json() if resp_units.status_code == 200 else []
+        degraded = resp_units.status_code != 200
+        units = [] if degraded else resp_units.json()
+
+        # Свободные даты по всем помещениям объекта одним запросом
+        availability: dict[int, list] = {}
+        if units:
+            date_from = date.today()
+            date_to = date_from + timedelta(days=AVAILABILITY_DAYS)
+            try:
+                resp_availability = await client.get(
+                    f"{LEASING_BASE}/api/v1/leases/availability/batch",
+                    params={
+                        "unit_ids": [u["id"] for u in units],
+                        "from": date_from.isoformat(),
+                        "to": date_to.isoformat(),
+                    },
+                    timeout=10.0,
+                )
+                if resp_availability.status_code == 200:
+                    availability = {
+                        item["unit_id"]: item["free"]
+                        for item in resp_availability.json()
+                    }
+                else:
+                    degraded = True
+            except httpx.RequestError:
+                # календарь необязателен — показываем страницу без него
+                availability = {}
+                degraded = True
         
-        return templates.TemplateResponse(
+        response = templates.TemplateResponse(
             "catalog_detail.html",
             {
                 "request": request,
                 "property": property_data,
                 "units": units,
+                "availability": availability,
+                "availability_days": AVAILABILITY_DAYS,
                 "error": None,
             },
         )
+        # неполная страница не должна раздаваться из кэша всем посетителям
+        return mark_degraded(response) if degraded else response
 
 
 @app.get("/catalog/{property_id}/unit/{unit_id}/lease", response_class=HTMLResponse)
@@ -762,8 +996,11 @@ async def catalog_unit_lease_form(
     if not token:
         return RedirectResponse(url=f"/login?redirect=/catalog/{property_id}/unit/{unit_id}/lease")
     
+    # Ключ повтора: повторная отправка формы не создаст второй договор
+    idempotency_key = new_idempotency_key()
+
     # Получаем информацию о помещении
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp_unit = await client.get(
                 f"{PROPERTY_BASE}/api/v1/units/public/{unit_id}",
@@ -799,6 +1036,7 @@ async def catalog_unit_lease_form(
             "catalog_lease_form.html",
             {
                 "request": request,
+                "idempotency_key": idempotency_key,
                 "unit": unit,
                 "property_id": property_id,
                 "error": None,
@@ -814,14 +1052,17 @@ async def catalog_unit_lease_create(
     start_date: str = Form(...),
     end_date: str | None = Form(None),
     status: str = Form("ACTIVE"),
+    idempotency_key: str | None = Form(None),
 ):
     """Создание договора из публичного каталога"""
     token = get_token_from_cookies(request)
     if not token:
         return RedirectResponse(url="/login")
     
+    idempotency_key = idempotency_key or new_idempotency_key()
+
     # Получаем информацию о помещении для цены
-    async with httpx.AsyncClient() as client:
+    async with backend_client() as client:
         try:
             resp_unit = await client.get(
                 f"{PROPERTY_BASE}/api/v1/units/public/{unit_id}",
@@ -854,7 +1095,7 @@ async def catalog_unit_lease_create(
         unit = resp_unit.json()
         monthly_rent = float(unit["monthly_rent"])
         
-        headers = {"Authorization": f"Bearer {token}"}
+        headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": idempotency_key}
         json_data = {
             "unit_id": unit_id,
             "start_date": start_date,
@@ -875,6 +1116,7 @@ async def catalog_unit_lease_create(
                 "catalog_lease_form.html",
                 {
                     "request": request,
+                    "idempotency_key": idempotency_key,
                     "unit": unit,
                     "property_id": property_id,
                     "error": "Сервис договоров недоступен",
@@ -887,6 +1129,7 @@ async def catalog_unit_lease_create(
                 "catalog_lease_form.html",
                 {
                     "request": request,
+                    "idempotency_key": idempotency_key,
                     "unit": unit,
                     "property_id": property_id,
                     "error": f"Ошибка создания договора: {resp.status_code} {resp.text}",
@@ -941,7 +1184,7 @@ async def register_submit(
         )
 
     try:
-        async with httpx.AsyncClient(base_url=AUTH_BASE, timeout=5.0) as client:
+        async with backend_client(base_url=AUTH_BASE, timeout=5.0) as client:
             payload = {
                 "email": email,
                 "username": username,
@@ -0,0 +1,191 @@
+"""
+Метрики фронтенда в формате Prometheus (GET /metrics).
+
+- http_request_duration_seconds, http_requests_in_flight — входящие запросы
+  по шаблону маршрута;
+- http_compression_* — сжатые ответы и их объём до и после сжатия
+  (сэкономлено = input_bytes - output_bytes), см. compression.py;
+- backend_request_duration_seconds — каждая попытка обращения к микросервису
+  (MetricsTransport, нижний слой клиента) по бэкенду, методу и статусу;
+- backend_breaker_state, backend_retries, backend_hedges — состояние
+  ResilientTransport;
+- cache_* — попадания и промахи кэшей фронтенда (register_caches).
+
+Под gunicorn с несколькими воркерами (задан PROMETHEUS_MULTIPROC_DIR, см.
+gunicorn.conf.py) счётчики, гистограммы и gauge-метрики пишутся каждым
+воркером в файлы этого каталога, и /metrics суммирует их по всем воркерам
+(MultiProcessCollector). cache_* и backend_breaker_*, backend_retries,
+backend_hedges — состояние того воркера, который обслужил запрос: кэши и
+предохранители у воркеров свои.
+"""
+import os
+import time
+
+import httpx
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP-запросы в обработке", multiprocess_mode="livesum"
+)
+
+COMPRESSED_RESPONSES = Counter("http_compressed_responses", "Сжатые ответы", ["encoding"])
+COMPRESSION_INPUT = Counter(
+    "http_compression_input_bytes", "Байты тела ответа до сжатия", ["encoding"]
+)
+COMPRESSION_OUTPUT = Counter(
+    "http_compression_output_bytes", "Байты тела ответа после сжатия", ["encoding"]
+)
+
+BACKEND_LATENCY = Histogram(
+    "backend_request_duration_seconds",
+    "Время обращения к микросервису",
+    ["backend", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+_collectors = []
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность по шаблону маршрута и число запросов в работе"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+
+class MetricsTransport(httpx.AsyncBaseTransport):
+    """Замеряет каждую попытку обращения к бэкенду (до получения заголовков ответа)"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self._transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            BACKEND_LATENCY.labels(
+                request.url.netloc.decode(), request.method, status
+            ).observe(time.perf_counter() - started)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class CacheCollector:
+    """Счётчики кэшей из их stats(): hits, misses, size, bytes"""
+
+    def __init__(self, caches: dict):
+        self.caches = caches
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Попадания в кэш", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Промахи кэша", labels=["cache"])
+        size = GaugeMetricFamily("cache_size", "Записей в кэше", labels=["cache"])
+        size_bytes = GaugeMetricFamily("cache_bytes", "Объём записей кэша", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Доля попаданий в кэш", labels=["cache"])
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            size.add_metric([name], stats["size"])
+            size_bytes.add_metric([name], stats["bytes"])
+            ratio.add_metric([name], stats["hit_rate"])
+        yield from (hits, misses, size, size_bytes, ratio)
+
+
+class ResilienceCollector:
+    """Состояние предохранителей, повторы и hedging из ResilientTransport.stats()"""
+
+    def __init__(self, resilience):
+        self.resilience = resilience
+
+    def collect(self):
+        stats = self.resilience.stats()
+        state = GaugeMetricFamily(
+            "backend_breaker_state",
+            "Предохранитель бэкенда: 0 — замкнут, 1 — half-open, 2 — разомкнут",
+            labels=["backend"],
+        )
+        rejected = CounterMetricFamily(
+            "backend_breaker_rejected", "Запросы, отклонённые предохранителем", labels=["backend"]
+        )
+        for backend, item in stats["backends"].items():
+            state.add_metric([backend], BREAKER_STATES[item["state"]])
+            rejected.add_metric([backend], item["rejected"])
+        yield state
+        yield rejected
+        yield CounterMetricFamily("backend_retries", "Повторы запросов к бэкендам", value=stats["retries"])
+        yield CounterMetricFamily("backend_hedges", "Дублирующие (hedged) запросы", value=stats["hedges"])
+
+
+def _register(collector) -> None:
+    _collectors.append(collector)
+    REGISTRY.register(collector)
+
+
+def register_caches(**caches) -> None:
+    _register(CacheCollector(caches))
+
+
+def register_resilience(resilience) -> None:
+    _register(ResilienceCollector(resilience))
+
+
+def metrics_response() -> Response:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in _collectors:
+            registry.register(collector)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
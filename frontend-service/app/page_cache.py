@@ -0,0 +1,153 @@
+"""
+Кэш отрендеренных страниц для анонимных посетителей.
+
+Ключ — путь и отсортированная строка запроса. Страница отдаётся из памяти
+с ETag и Cache-Control, поэтому браузер и обратный прокси могут
+перепроверять её условным запросом и получать 304. Запросы с cookie
+access_token (страница зависит от пользователя) идут мимо кэша.
+Потоковые ответы (StreamingResponse) отдаются клиенту сразу, а в кэш
+попадают, когда поток дочитан до конца без ошибки. Страница, отрисованная
+без части данных (бэкенд не ответил), помечается mark_degraded и в кэш не
+попадает.
+
+Сжатые варианты страницы (br, gzip) хранятся в той же записи: страница
+сжимается при первом запросе с этой кодировкой, дальше байты отдаются
+готовыми, и CompressionMiddleware пропускает ответ с Content-Encoding.
+"""
+import functools
+import hashlib
+import os
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+
+from app.cache import TTLCache
+from app.compression import (
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_TYPES,
+    ENCODINGS,
+    choose_encoding,
+    compress,
+)
+from app.metrics import COMPRESSED_RESPONSES, COMPRESSION_INPUT, COMPRESSION_OUTPUT
+
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "30"))
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "2000"))
+PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", "10"))
+PAGE_COMPRESSION = COMPRESSION_ENABLED and "text/html" in COMPRESSION_TYPES
+
+
+class CachedPage(NamedTuple):
+    etag: str
+    body: bytes
+    # кодировка -> сжатое тело; None — сжатие не уменьшает страницу
+    encoded: Dict[str, Optional[bytes]]
+
+
+page_cache = TTLCache(maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+
+
+def _cache_key(request: Request) -> str:
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def _page_headers(page: CachedPage, encoding: Optional[str] = None) -> dict:
+    headers = {
+        # байты сжатого варианта другие, поэтому его ETag слабый
+        "ETag": "W/" + page.etag if encoding else page.etag,
+        "Cache-Control": f"public, max-age={PAGE_CACHE_MAX_AGE}",
+        # Вариант страницы для авторизованного пользователя другой
+        "Vary": "Cookie, Accept-Encoding" if PAGE_COMPRESSION else "Cookie",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def _make_page(body: bytes) -> CachedPage:
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    return CachedPage(etag=etag, body=body, encoded={})
+
+
+def _negotiate(request: Request, page: CachedPage) -> Optional[str]:
+    """Кодировка, в которой отдаётся страница; сжатый вариант создаётся один раз"""
+    if not PAGE_COMPRESSION or len(page.body) < COMPRESSION_MIN_SIZE:
+        return None
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), ENCODINGS)
+    if encoding is None:
+        return None
+    if encoding not in page.encoded:
+        compressed = compress(page.body, encoding)
+        page.encoded[encoding] = compressed if len(compressed) < len(page.body) else None
+    return encoding if page.encoded[encoding] is not None else None
+
+
+async def _tee(body_iterator, key: str, stream):
+    chunks = []
+    async for chunk in body_iterator:
+        chunks.append(chunk)
+        yield chunk
+    # страница, дорисованная с ошибкой подгрузки, не кэшируется
+    if stream is None or not stream.error:
+        page_cache.set(key, _make_page(b"".join(chunks)))
+
+
+def mark_degraded(response: Response) -> Response:
+    """Страница отрисована без части данных: не кэшировать её для других посетителей"""
+    response.page_degraded = True
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
+def cached_page(endpoint):
+    """Декоратор обработчика страницы: кэширует успешные ответы анонимным посетителям"""
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        request: Request = kwargs["request"]
+        if request.cookies.get("access_token"):
+            return await endpoint(*args, **kwargs)
+
+        key = _cache_key(request)
+        page = page_cache.get(key)
+        if page is None:
+            response = await endpoint(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if isinstance(response, StreamingResponse):
+                stream = getattr(response, "stream_state", None)
+                response.body_iterator = _tee(response.body_iterator, key, stream)
+                response.headers["Vary"] = "Cookie"
+                return response
+            if not isinstance(response, HTMLResponse) or getattr(response, "page_degraded", False):
+                return response
+            page = _make_page(bytes(response.body))
+            page_cache.set(key, page)
+
+        encoding = _negotiate(request, page)
+        if _etag_matches(request, page.etag):
+            headers = _page_headers(page, encoding)
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+        if encoding is None:
+            return HTMLResponse(content=page.body, headers=_page_headers(page))
+
+        body = page.encoded[encoding]
+        COMPRESSED_RESPONSES.labels(encoding).inc()
+        COMPRESSION_INPUT.labels(encoding).inc(len(page.body))
+        COMPRESSION_OUTPUT.labels(encoding).inc(len(body))
+        return HTMLResponse(content=body, headers=_page_headers(page, encoding))
+
+    return wrapper
@@ -0,0 +1,285 @@
+"""
+Устойчивость обращений к микросервисам.
+
+ResilientTransport — слой транспорта httpx под кэшем ETag:
+- у каждого бэкенда (host:port) свой автомат-предохранитель (circuit breaker):
+  при высокой доле ошибок в скользящем окне он размыкается, и запросы сразу
+  завершаются BackendUnavailable (подкласс httpx.RequestError, поэтому
+  обработчики показывают обычную страницу «сервис недоступен»), не занимая
+  воркер на время таймаута. Через BREAKER_OPEN_SECONDS пропускаются пробные
+  запросы (half-open): успех замыкает цепь, ошибка размыкает снова;
+- идемпотентные запросы (GET/HEAD, а также запросы с заголовком
+  Idempotency-Key — повтор вернёт ответ первой попытки) после ошибки
+  соединения или ответа 502/503/504 повторяются с экспоненциальной
+  задержкой и полным джиттером;
+  таймауты не повторяются, чтобы не умножать время ожидания;
+- ответ 504 с заголовком X-Deadline-Exceeded (у страницы кончился бюджет,
+  бэкенд здоров) не считается ошибкой бэкенда и не повторяется — как
+  DeadlineExceeded до отправки;
+- по желанию (BACKEND_HEDGE=1) GET, не ответивший за p95 задержки этого
+  бэкенда, дублируется, и берётся первый успешный ответ.
+"""
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import httpx
+
+from app.deadline import EXCEEDED_HEADER, DeadlineExceeded
+
+BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "30"))
+BREAKER_MIN_REQUESTS = int(os.getenv("BREAKER_MIN_REQUESTS", "20"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "10"))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "3"))
+
+RETRY_ATTEMPTS = int(os.getenv("BACKEND_RETRY_ATTEMPTS", "2"))
+RETRY_BASE_DELAY = float(os.getenv("BACKEND_RETRY_BASE_DELAY", "0.05"))
+RETRY_MAX_DELAY = float(os.getenv("BACKEND_RETRY_MAX_DELAY", "1.0"))
+
+HEDGE_ENABLED = os.getenv("BACKEND_HEDGE", "0").lower() in ("1", "true", "yes")
+HEDGE_MIN_DELAY = float(os.getenv("BACKEND_HEDGE_MIN_DELAY", "0.02"))
+HEDGE_MIN_SAMPLES = 50
+LATENCY_SAMPLES = 500
+
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+RETRY_STATUSES = {502, 503, 504}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BackendUnavailable(httpx.TransportError):
+    """Запрос не отправлен: предохранитель бэкенда разомкнут"""
+
+
+class CircuitBreaker:
+    """Предохранитель по доле ошибок в скользящем окне времени"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - BREAKER_WINDOW_SECONDS:
+            _, ok = self._outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < BREAKER_OPEN_SECONDS:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= BREAKER_HALF_OPEN_PROBES:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def record(self, ok: bool) -> None:
+        now = time.monotonic()
+        if self.state == OPEN:
+            # ответ на запрос, отправленный до размыкания
+            return
+        if self.state == HALF_OPEN:
+            if ok:
+                self._reset()
+            else:
+                self._open(now)
+            return
+
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        self._trim(now)
+        total = len(self._outcomes)
+        if total >= BREAKER_MIN_REQUESTS and self._failures / total >= BREAKER_FAILURE_RATE:
+            self._open(now)
+
+    def release(self) -> None:
+        """Запрос завершился без ответа бэкенда (отмена, дедлайн): освобождаем место пробы"""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self.trips += 1
+
+    def _reset(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+
+    def stats(self) -> dict:
+        self._trim(time.monotonic())
+        return {
+            "state": self.state,
+            "window_requests": len(self._outcomes),
+            "window_failures": self._failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyTracker:
+    """Последние задержки успешных ответов бэкенда для порога hedging"""
+
+    def __init__(self):
+        self._samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    return response.status_code >= 500
+
+
+def _deadline_exceeded(response: httpx.Response) -> bool:
+    return response.status_code == 504 and EXCEEDED_HEADER in response.headers
+
+
+def _retryable(request: httpx.Request) -> bool:
+    return request.method in IDEMPOTENT_METHODS or "idempotency-key" in request.headers
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """Предохранитель, повторы и hedging поверх транспорта с пулом соединений"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.retries = 0
+        self.hedges = 0
+
+    def _backend(self, request: httpx.Request) -> str:
+        backend = request.url.netloc.decode()
+        if backend not in self.breakers:
+            self.breakers[backend] = CircuitBreaker(backend)
+            self.latency[backend] = LatencyTracker()
+        return backend
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        backend = self._backend(request)
+        breaker = self.breakers[backend]
+        attempts = 1 + (RETRY_ATTEMPTS if _retryable(request) else 0)
+
+        for attempt in range(attempts):
+            if not breaker.allow():
+                raise BackendUnavailable(f"Backend {backend} is unavailable", request=request)
+
+            last_attempt = attempt == attempts - 1
+            try:
+                response = await self._send(request, backend)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except DeadlineExceeded:
+                # бэкенд ни при чём: время кончилось у самой страницы
+                breaker.release()
+                raise
+            except httpx.TransportError as exc:
+                breaker.record(False)
+                if last_attempt or isinstance(exc, httpx.TimeoutException):
+                    raise
+            else:
+                if _deadline_exceeded(response):
+                    breaker.release()
+                    return response
+                breaker.record(not _is_failure(response))
+                if last_attempt or response.status_code not in RETRY_STATUSES:
+                    return response
+                await response.aclose()
+
+            self.retries += 1
+            await asyncio.sleep(_backoff(attempt))
+
+    async def _send(self, request: httpx.Request, backend: str) -> httpx.Response:
+        latency = self.latency[backend]
+        delay = latency.p95() if HEDGE_ENABLED and request.method == "GET" else None
+        started = time.perf_counter()
+        if delay is None:
+            response = await self._transport.handle_async_request(request)
+        else:
+            response = await self._hedged(request, max(delay, HEDGE_MIN_DELAY))
+        if not _is_failure(response):
+            latency.add(time.perf_counter() - started)
+        return response
+
+    async def _hedged(self, request: httpx.Request, delay: float) -> httpx.Response:
+        primary = asyncio.ensure_future(self._transport.handle_async_request(request))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        self.hedges += 1
+        hedge = asyncio.ensure_future(self._transport.handle_async_request(request))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    response = task.result()
+                    if _is_failure(response) and pending:
+                        await response.aclose()
+                        continue
+                    return response
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_close_late_response)
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "backends": {
+                name: {**breaker.stats(), "p95_ms": _ms(self.latency[name].p95())}
+                for name, breaker in self.breakers.items()
+            },
+        }
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _close_late_response(task: "asyncio.Future") -> None:
+    # Проигравший в hedging запрос мог успеть получить ответ — возвращаем соединение в пул
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().aclose())
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
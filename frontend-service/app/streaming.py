@@ -0,0 +1,88 @@
+"""
+Потоковый рендеринг больших списков.
+
+Первая страница данных запрашивается до начала ответа (чтобы корректно
+обработать 401 и ошибки сервиса), остальные страницы подгружаются
+keyset-пагинацией (after_id/limit) по мере того, как шаблон их потребляет.
+Шаблон рендерится через generate_async() в StreamingResponse, поэтому
+время до первого байта не зависит от размера списка.
+"""
+import os
+from typing import AsyncIterator, List, Optional
+
+import httpx
+from fastapi.responses import StreamingResponse
+
+from app.backend import backend_client
+from app.templating import stream_env
+
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "200"))
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "8192"))
+
+
+class StreamState:
+    """Состояние потока: ошибка, случившаяся после отправки заголовков ответа"""
+
+    def __init__(self):
+        self.error: Optional[str] = None
+
+
+async def paginate_pages(
+    url: str,
+    first_page: List[dict],
+    state: StreamState,
+    headers: Optional[dict] = None,
+    params: Optional[dict] = None,
+    page_size: int = LIST_PAGE_SIZE,
+) -> AsyncIterator[List[dict]]:
+    page = first_page
+    params = dict(params or {})
+    async with backend_client() as client:
+        while True:
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            params.update(after_id=page[-1]["id"], limit=page_size)
+            try:
+                resp = await client.get(url, headers=headers, params=params, timeout=10.0)
+            except httpx.RequestError:
+                state.error = "Сервис недоступен: список загружен не полностью"
+                return
+            if resp.status_code != 200:
+                state.error = f"Ошибка сервиса ({resp.status_code}): список загружен не полностью"
+                return
+            page = resp.json()
+
+
+async def paginate(url: str, first_page: List[dict], state: StreamState, **kwargs) -> AsyncIterator[dict]:
+    async for page in paginate_pages(url, first_page, state, **kwargs):
+        for item in page:
+            yield item
+
+
+async def _encode(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    # Jinja отдаёт мелкие фрагменты; склеиваем их в блоки разумного размера
+    buffer: List[str] = []
+    size = 0
+    async for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def render_stream(name: str, context: dict, status_code: int = 200) -> StreamingResponse:
+    template = stream_env.get_template(name)
+    response = StreamingResponse(
+        _encode(template.generate_async(context)),
+        status_code=status_code,
+        media_type="text/html; charset=utf-8",
+    )
+    # кэш страниц проверяет, дорисован ли список полностью
+    response.stream_state = context.get("stream")
+    return response
@@ -0,0 +1,75 @@
+"""
+Настройка Jinja2 для фронтенда.
+
+Скомпилированные шаблоны сохраняются в файловый bytecode-кэш, общий для всех
+воркеров контейнера, а при старте все шаблоны компилируются заранее, чтобы
+первый запрос после деплоя не платил за разбор. В production (APP_ENV=production)
+проверка изменений файлов шаблонов отключена.
+"""
+import logging
+import os
+import tempfile
+import time
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+
+logger = logging.getLogger(__name__)
+
+APP_ENV = os.getenv("APP_ENV", "development")
+TEMPLATES_DIR = "app/templates"
+JINJA_BYTECODE_CACHE_DIR = os.getenv(
+    "JINJA_BYTECODE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "rental-frontend-jinja2"),
+)
+
+
+def create_environment() -> jinja2.Environment:
+    production = APP_ENV == "production"
+    os.makedirs(os.path.join(JINJA_BYTECODE_CACHE_DIR, "async"), exist_ok=True)
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR),
+        auto_reload=not production,
+        # в production набор шаблонов фиксирован — держим в памяти все
+        cache_size=-1 if production else 400,
+    )
+
+
+env = create_environment()
+templates = Jinja2Templates(env=env)
+
+# Асинхронный вариант окружения для потокового рендеринга (generate_async).
+# Ключ bytecode-кэша Jinja не учитывает режим компиляции, поэтому
+# у асинхронных шаблонов отдельный каталог кэша.
+stream_env = env.overlay(
+    enable_async=True,
+    bytecode_cache=jinja2.FileSystemBytecodeCache(
+        os.path.join(JINJA_BYTECODE_CACHE_DIR, "async")
+    ),
+)
+
+
+def precompile_templates() -> dict:
+    """Загрузить (и скомпилировать) все шаблоны; возвращает отчёт о времени"""
+    started = time.perf_counter()
+    per_template = {}
+    for name in env.list_templates(extensions=["html"]):
+        t0 = time.perf_counter()
+        env.get_template(name)
+        stream_env.get_template(name)
+        per_template[name] = round((time.perf_counter() - t0) * 1000, 3)
+    report = {
+        "app_env": APP_ENV,
+        "auto_reload": env.auto_reload,
+        "bytecode_cache_dir": JINJA_BYTECODE_CACHE_DIR,
+        "templates": len(per_template),
+        "precompile_ms": round((time.perf_counter() - started) * 1000, 3),
+        "per_template_ms": per_template,
+    }
+    logger.info(
+        "Precompiled %d templates in %.1f ms (auto_reload=%s)",
+        report["templates"], report["precompile_ms"], env.auto_reload,
+    )
+    return report
@@ -0,0 +1,187 @@
+"""
+Минимальная трассировка запросов без внешнего коллектора.
+
+TracingMiddleware открывает серверный span на каждый запрос к фронтенду,
+TracingTransport (слой клиента микросервисов) — клиентский span на каждую
+попытку обращения к бэкенду и передаёт контекст заголовком W3C traceparent,
+так что span'ы бэкендов и их SQL попадают в ту же трассу.
+
+Завершённые span'ы передаются экспортёрам: при заданном TRACE_FILE они
+дописываются в JSONL-файл, который разбирает scripts/trace_view.py.
+Дополнительные экспортёры (например, список в тестах) — add_exporter().
+"""
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+import httpx
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "frontend-service")
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "service": SERVICE_NAME,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration_ms": round((self.end - self.start) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_exporters: List[Callable[[dict], None]] = []
+
+
+def add_exporter(exporter: Callable[[dict], None]) -> None:
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter: Callable[[dict], None]) -> None:
+    _exporters.remove(exporter)
+
+
+class FileExporter:
+    """Дописывает span'ы в JSONL-файл (по строке на span)"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, span: dict) -> None:
+        line = json.dumps(span, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+if TRACE_FILE:
+    add_exporter(FileExporter(TRACE_FILE))
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_span_id) из заголовка traceparent или (None, None)"""
+    match = TRACEPARENT_RE.match(header.strip().lower()) if header else None
+    if not match or match.group(1) == "0" * 32:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+def _new_span(name: str, kind: str, attributes: Optional[dict], traceparent: Optional[str] = None) -> Span:
+    parent = _current.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = parse_traceparent(traceparent)
+        trace_id = trace_id or secrets.token_hex(16)
+    return Span(name, kind, trace_id, parent_id, dict(attributes or {}))
+
+
+def finish_span(span: Span, end: Optional[float] = None) -> None:
+    span.end = end or time.time()
+    if not _exporters:
+        return
+    data = span.to_dict()
+    for exporter in list(_exporters):
+        exporter(data)
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", attributes: Optional[dict] = None, traceparent: Optional[str] = None):
+    span = _new_span(name, kind, attributes, traceparent)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.error = repr(exc)
+        raise
+    finally:
+        _current.reset(token)
+        finish_span(span)
+
+
+class TracingMiddleware:
+    """ASGI-middleware: серверный span на каждый HTTP-запрос"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1") or None
+        attributes = {"http.method": scope["method"], "http.target": scope["path"]}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+            await send(message)
+
+        with start_span(scope["method"], "server", attributes, traceparent) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{scope['method']} {route}"
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """Клиентский span на каждую попытку и заголовок traceparent для бэкенда"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attributes = {
+            "http.method": request.method,
+            "http.url": str(request.url.copy_with(query=None)),
+            "peer.service": request.url.netloc.decode(),
+        }
+        with start_span(f"{request.method} {request.url.path}", "client", attributes) as span:
+            request.headers["traceparent"] = span.traceparent
+            response = await self._transport.handle_async_request(request)
+            span.attributes["http.status_code"] = response.status_code
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -1,33 +1,244 @@
-from typing import List
+from typing import Dict, List, Optional
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.db.session import get_db
-from app.models.leasing import Lease
-from app.schemas.leasing import LeaseCreate, LeaseRead, LeaseWithPayments
-from app.core.security import get_current_user, CurrentUser
+from app.models.leasing import Lease, LeaseArchive
+from app.schemas.leasing import (
+    LeaseCreate,
+    LeaseRead,
+    LeaseWithPayments,
+    DateRange,
+    UnitAvailability,
+    LeaseSummary,
+    LeaseSummaryRequest,
+    UnitLeaseSummary,
+)
+from app.core.security import get_current_user, CurrentUser, decode_units_token
+from app.core.config import settings
+from app.core.http_cache import make_etag, is_not_modified, not_modified, set_validators
+from app.core import idempotency
+from app.core.deadline import is_deadline_error
 
 router = APIRouter()
 
+# Свободные интервалы считаются в БД: из запрошенного окна вычитается
+# объединение периодов ACTIVE-договоров (range_agg по daterange).
+# Выражение daterange(start_date, end_date, '[]') совпадает с выражением
+# GiST-индекса idx_lease_active_period, поэтому пересечение && идёт по индексу.
+AVAILABILITY_SQL = text(
+    """
+    SELECT u.unit_id,
+           lower(f.free) AS start_date,
+           upper(f.free) - 1 AS end_date
+    FROM unnest(CAST(:unit_ids AS integer[])) AS u(unit_id)
+    CROSS JOIN LATERAL unnest(
+        datemultirange(daterange(:date_from, :date_to, '[]'))
+        - COALESCE(
+            (
+                SELECT range_agg(daterange(l.start_date, l.end_date, '[]'))
+                FROM leasing.lease AS l
+                WHERE l.unit_id = u.unit_id
+                  AND l.status = 'ACTIVE'
+                  AND daterange(l.start_date, l.end_date, '[]')
+                      && daterange(:date_from, :date_to, '[]')
+            ),
+            datemultirange()
+        )
+    ) AS f(free)
+    ORDER BY u.unit_id, start_date
+    """
+)
+
+# Сводка для кабинета владельца: действующие договоры и оплаченные с начала
+# месяца платежи по набору помещений (индексы idx_lease_unit_id и
+# idx_payment_lease_id). Помещения без активности в ответ не попадают.
+SUMMARY_SQL = text(
+    """
+    SELECT u.unit_id,
+           a.active_leases,
+           p.payments_total,
+           p.payments_count
+    FROM unnest(CAST(:unit_ids AS integer[])) AS u(unit_id)
+    CROSS JOIN LATERAL (
+        SELECT count(*) AS active_leases
+        FROM leasing.lease AS l
+        WHERE l.unit_id = u.unit_id AND l.status = 'ACTIVE'
+    ) AS a
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(sum(pm.amount), 0) AS payments_total,
+               count(pm.id) AS payments_count
+        FROM leasing.lease AS l
+        JOIN leasing.payment AS pm ON pm.lease_id = l.id
+        WHERE l.unit_id = u.unit_id
+          AND pm.status = 'PAID'
+          AND pm.payment_date BETWEEN :month_start AND :today
+    ) AS p
+    WHERE a.active_leases > 0 OR p.payments_count > 0
+    ORDER BY u.unit_id
+    """
+)
+
+
+def _get_availability(
+    db: Session, unit_ids: List[int], date_from: date, date_to: date
+) -> List[UnitAvailability]:
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Дата окончания не может быть раньше даты начала",
+        )
+    if (date_to - date_from).days > settings.AVAILABILITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Период не может превышать {settings.AVAILABILITY_MAX_DAYS} дней",
+        )
+
+    unique_ids = list(dict.fromkeys(unit_ids))
+    free: Dict[int, List[DateRange]] = {unit_id: [] for unit_id in unique_ids}
+    rows = db.execute(
+        AVAILABILITY_SQL,
+        {"unit_ids": unique_ids, "date_from": date_from, "date_to": date_to},
+    )
+    for row in rows:
+        free[row.unit_id].append(
+            DateRange(start_date=row.start_date, end_date=row.end_date)
+        )
+    return [UnitAvailability(unit_id=unit_id, free=ranges) for unit_id, ranges in free.items()]
+
+
+@router.get("/availability", response_model=UnitAvailability)
+def get_unit_availability(
+    unit_id: int = Query(..., description="ID помещения"),
+    date_from: date = Query(..., alias="from", description="Начало периода"),
+    date_to: date = Query(..., alias="to", description="Конец периода (включительно)"),
+    db: Session = Depends(get_db),
+):
+    """Свободные интервалы помещения за период (публичный доступ)"""
+    return _get_availability(db, [unit_id], date_from, date_to)[0]
+
+
+@router.get("/availability/batch", response_model=List[UnitAvailability])
+def get_units_availability(
+    unit_ids: List[int] = Query(..., description="ID помещений"),
+    date_from: date = Query(..., alias="from", description="Начало периода"),
+    date_to: date = Query(..., alias="to", description="Конец периода (включительно)"),
+    db: Session = Depends(get_db),
+):
+    """Свободные интервалы для набора помещений одним запросом (публичный доступ)"""
+    if len(unit_ids) > settings.AVAILABILITY_MAX_UNITS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не более {settings.AVAILABILITY_MAX_UNITS} помещений за запрос",
+        )
+    return _get_availability(db, unit_ids, date_from, date_to)
+
+
+@router.post("/summary", response_model=LeaseSummary)
+def leases_summary(
+    summary_in: LeaseSummaryRequest,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Договоры и платежи с начала месяца по помещениям владельца"""
+    unit_ids = decode_units_token(summary_in.units_token, current_user.id)
+    summary = LeaseSummary()
+    if not unit_ids:
+        return summary
+
+    today = date.today()
+    rows = db.execute(
+        SUMMARY_SQL,
+        {"unit_ids": unit_ids, "month_start": today.replace(day=1), "today": today},
+    )
+    for row in rows:
+        summary.units.append(
+            UnitLeaseSummary(
+                unit_id=row.unit_id,
+                active_leases=row.active_leases,
+                payments_mtd_total=row.payments_total,
+                payments_mtd_count=row.payments_count,
+            )
+        )
+        summary.active_leases += row.active_leases
+        summary.payments_mtd_total += float(row.payments_total)
+        summary.payments_mtd_count += row.payments_count
+    return summary
+
+
+def _page(query, model, after_id: Optional[int], limit: Optional[int]):
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    query = query.order_by(model.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
 
 @router.get("/", response_model=List[LeaseRead])
 def list_leases(
+    request: Request,
+    response: Response,
+    after_id: Optional[int] = Query(None, description="id последней записи предыдущей страницы"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_LIMIT),
+    include_archived: bool = Query(False, description="Включить договоры из архива"),
     db: Session = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """Получить список договоров аренды текущего пользователя"""
-    leases = db.query(Lease).filter(Lease.user_id == current_user.id).all()
+    # Версия списка — количество строк и максимальный updated_at;
+    # при совпадении ETag сами строки не загружаются
+    count, last_modified = (
+        db.query(func.count(Lease.id), func.max(Lease.updated_at))
+        .filter(Lease.user_id == current_user.id)
+        .one()
+    )
+    if include_archived:
+        # перенос в архив не меняет ни числа строк, ни updated_at объединённого списка
+        archived_count, archived_modified = (
+            db.query(func.count(LeaseArchive.id), func.max(LeaseArchive.updated_at))
+            .filter(LeaseArchive.user_id == current_user.id)
+            .one()
+        )
+        count += archived_count
+        last_modified = max(filter(None, [last_modified, archived_modified]), default=None)
+    etag = make_etag("leases", current_user.id, after_id, limit, include_archived, count, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+
+    leases = _page(db.query(Lease).filter(Lease.user_id == current_user.id), Lease, after_id, limit)
+    if include_archived:
+        # id архива и рабочей таблицы не пересекаются: страницы склеиваются по id
+        archived = _page(
+            db.query(LeaseArchive).filter(LeaseArchive.user_id == current_user.id),
+            LeaseArchive,
+            after_id,
+            limit,
+        )
+        leases = sorted(leases + archived, key=lambda lease: lease.id)[:limit]
     return leases
 
 
 @router.post("/", response_model=LeaseRead, status_code=status.HTTP_201_CREATED)
 def create_lease(
     lease_in: LeaseCreate,
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", max_length=idempotency.MAX_KEY_LENGTH
+    ),
     db: Session = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
+    if idempotency_key is not None:
+        replay = idempotency.claim(
+            db, current_user.id, idempotency_key, idempotency.request_hash("lease", lease_in.dict())
+        )
+        if replay is not None:
+            return replay
+
     if lease_in.end_date and lease_in.end_date < lease_in.start_date:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,17 +271,27 @@ def create_lease(
             status=lease_in.status,
         )
         db.add(lease)
+        db.flush()
+        if idempotency_key is not None:
+            idempotency.store(
+                db, current_user.id, idempotency_key, status.HTTP_201_CREATED, LeaseRead.from_orm(lease)
+            )
         db.commit()
         db.refresh(lease)
         return lease
     except SQLAlchemyError as e:
         db.rollback()
+        # Дедлайн запроса (в т.ч. statement_timeout) — 504 от DeadlineMiddleware
+        if is_deadline_error(e):
+            raise
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}"
         )
     except Exception as e:
         db.rollback()
+        if is_deadline_error(e):
+            raise
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating lease: {str(e)}"
@@ -1,49 +1,113 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.db.session import get_db
-from app.models.leasing import Payment, Lease
+from app.models.leasing import Payment, Lease, PaymentArchive, LeaseArchive
 from app.schemas.leasing import PaymentCreate, PaymentRead
 from app.core.security import get_current_user, CurrentUser
+from app.core.http_cache import make_etag, is_not_modified, not_modified, set_validators
+from app.core import idempotency
+from app.core.deadline import is_deadline_error
 
 router = APIRouter()
 
 
+def _payment_filters(payment_model, lease_model, user_id: int, lease_id, date_from, date_to):
+    filters = [lease_model.user_id == user_id]
+    if lease_id is not None:
+        filters.append(payment_model.lease_id == lease_id)
+    # Условия по payment_date отсекают лишние месячные секции leasing.payment
+    if date_from is not None:
+        filters.append(payment_model.payment_date >= date_from)
+    if date_to is not None:
+        filters.append(payment_model.payment_date <= date_to)
+    return filters
+
+
 @router.get("/", response_model=List[PaymentRead])
 def list_payments(
+    request: Request,
+    response: Response,
     lease_id: int | None = None,
+    date_from: Optional[date] = Query(None, alias="from", description="Платежи не раньше этой даты"),
+    date_to: Optional[date] = Query(None, alias="to", description="Платежи не позже этой даты (включительно)"),
+    include_archived: bool = Query(False, description="Включить платежи архивных договоров"),
     db: Session = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """Получить список платежей текущего пользователя"""
-    # Фильтруем только платежи по договорам текущего пользователя
-    query = db.query(Payment).join(Lease).filter(Lease.user_id == current_user.id)
-    
     if lease_id is not None:
         # Дополнительно проверяем, что lease принадлежит пользователю
-        lease = db.query(Lease).filter(
-            Lease.id == lease_id,
-            Lease.user_id == current_user.id
-        ).first()
-        if not lease:
+        models = [Lease, LeaseArchive] if include_archived else [Lease]
+        if not any(
+            db.query(model.id).filter(model.id == lease_id, model.user_id == current_user.id).first()
+            for model in models
+        ):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Lease not found or access denied"
             )
-        query = query.filter(Payment.lease_id == lease_id)
-    
-    return query.all()
+
+    if date_from is not None and date_to is not None and date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Дата окончания не может быть раньше даты начала",
+        )
+
+    # Фильтруем только платежи по договорам текущего пользователя;
+    # платежи архивных договоров лежат в payment_archive
+    sources = [(Payment, Lease)]
+    if include_archived:
+        sources.append((PaymentArchive, LeaseArchive))
+    queries = []
+    count, last_modified = 0, None
+    for payment_model, lease_model in sources:
+        filters = _payment_filters(
+            payment_model, lease_model, current_user.id, lease_id, date_from, date_to
+        )
+        source_count, source_modified = (
+            db.query(func.count(payment_model.id), func.max(payment_model.updated_at))
+            .join(lease_model, payment_model.lease_id == lease_model.id)
+            .filter(*filters)
+            .one()
+        )
+        count += source_count
+        last_modified = max(filter(None, [last_modified, source_modified]), default=None)
+        queries.append(
+            db.query(payment_model).join(lease_model, payment_model.lease_id == lease_model.id).filter(*filters)
+        )
+
+    etag = make_etag(
+        "payments", current_user.id, lease_id, date_from, date_to, include_archived, count, last_modified
+    )
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+
+    return [payment for query in queries for payment in query.all()]
 
 
 @router.post("/", response_model=PaymentRead, status_code=status.HTTP_201_CREATED)
 def create_payment(
     pay_in: PaymentCreate,
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", max_length=idempotency.MAX_KEY_LENGTH
+    ),
     db: Session = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """Создать платеж (только для договоров текущего пользователя)"""
+    if idempotency_key is not None:
+        replay = idempotency.claim(
+            db, current_user.id, idempotency_key, idempotency.request_hash("payment", pay_in.dict())
+        )
+        if replay is not None:
+            return replay
+
     # Проверяем, что lease принадлежит текущему пользователю
     lease = db.query(Lease).filter(
         Lease.id == pay_in.lease_id,
@@ -65,17 +129,27 @@ def create_payment(
             method=pay_in.method,
         )
         db.add(pay)
+        db.flush()
+        if idempotency_key is not None:
+            idempotency.store(
+                db, current_user.id, idempotency_key, status.HTTP_201_CREATED, PaymentRead.from_orm(pay)
+            )
         db.commit()
         db.refresh(pay)
         return pay
     except SQLAlchemyError as e:
         db.rollback()
+        # Дедлайн запроса (в т.ч. statement_timeout) — 504 от DeadlineMiddleware
+        if is_deadline_error(e):
+            raise
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}"
         )
     except Exception as e:
         db.rollback()
+        if is_deadline_error(e):
+            raise
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating payment: {str(e)}"
@@ -2,8 +2,38 @@ from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "postgresql://rental_user:rental_pass@db:5432/rental_db"
+    # Пул соединений одного процесса; под gunicorn задаются из
+    # DB_CONNECTION_BUDGET (gunicorn.conf.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
     JWT_SECRET_KEY: str = "Project_secret_key"
     JWT_ALGORITHM: str = "HS256"
+    LIST_MAX_LIMIT: int = 1000
+    AVAILABILITY_MAX_UNITS: int = 500
+    AVAILABILITY_MAX_DAYS: int = 730
+    DEBUG: bool = False
+    QUERY_COUNT_WARN_THRESHOLD: int = 20
+    QUERY_REPEAT_WARN_THRESHOLD: int = 5
+    SERVICE_NAME: str = "leasing-service"
+    TRACE_FILE: str = ""
+    # Сжатие ответов (app/core/compression.py). Ответы читает фронтенд по
+    # внутренней сети, поэтому уровень минимальный: почти весь выигрыш для JSON
+    # при минимальной цене в CPU
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 1
+    COMPRESSION_BROTLI_QUALITY: int = 1
+    COMPRESSION_TYPES: str = "application/json,text/plain"
+    # Секции leasing.payment создаются на столько месяцев вперёд
+    PAYMENT_PARTITIONS_AHEAD_MONTHS: int = 3
+    MAINTENANCE_ENABLED: bool = True
+    MAINTENANCE_INTERVAL_SECONDS: int = 3600
+    # Закрытые договоры старше стольких месяцев переносятся в архив
+    ARCHIVE_AFTER_MONTHS: int = 12
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_MAX_BATCHES: int = 200  # за один проход обслуживания
+    # Сколько хранятся ключи Idempotency-Key (повтор позже выполнится заново)
+    IDEMPOTENCY_TTL_HOURS: int = 24
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,91 @@
+"""
+Идемпотентное создание записей по заголовку Idempotency-Key.
+
+Ключ занимается в той же транзакции, что и создаваемая запись (claim), и
+в неё же записывается ответ (store): после commit ключ и запись существуют
+вместе, после rollback (ошибка проверки, сбой БД) — ни того, ни другого, и
+повтор выполнится заново. Повтор с тем же ключом получает сохранённый ответ
+без проверок и вставок. Параллельный запрос с тем же ключом ждёт на
+уникальном индексе, пока первый не завершится, и затем получает его ответ.
+
+Ключ действует в пределах пользователя; повтор с другим телом запроса —
+ошибка 422. Старые ключи удаляет фоновая задача (app/db/maintenance.py)
+через IDEMPOTENCY_TTL_HOURS.
+"""
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+MAX_KEY_LENGTH = 100
+REPLAY_HEADER = "Idempotent-Replayed"
+
+CLAIM_SQL = text(
+    """
+    INSERT INTO leasing.idempotency (user_id, key, request_hash)
+    VALUES (:user_id, :key, :request_hash)
+    ON CONFLICT (user_id, key) DO NOTHING
+    RETURNING 1
+    """
+)
+
+STORED_SQL = text(
+    """
+    SELECT request_hash, status_code, response
+    FROM leasing.idempotency
+    WHERE user_id = :user_id AND key = :key
+    """
+)
+
+STORE_SQL = text(
+    """
+    UPDATE leasing.idempotency
+    SET status_code = :status_code, response = CAST(:response AS jsonb)
+    WHERE user_id = :user_id AND key = :key
+    """
+)
+
+
+def request_hash(endpoint: str, payload: dict) -> bytes:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(f"{endpoint}:{body}".encode(), digest_size=16).digest()
+
+
+def claim(db: Session, user_id: int, key: str, fingerprint: bytes) -> Optional[JSONResponse]:
+    """
+    Занять ключ в текущей транзакции. None — ключ новый, запрос выполняется;
+    иначе — сохранённый ответ исходного запроса.
+    """
+    if db.execute(CLAIM_SQL, {"user_id": user_id, "key": key, "request_hash": fingerprint}).first():
+        return None
+
+    stored = db.execute(STORED_SQL, {"user_id": user_id, "key": key}).one()
+    db.rollback()
+    if bytes(stored.request_hash) != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key уже использован для другого запроса",
+        )
+    return JSONResponse(
+        content=stored.response,
+        status_code=stored.status_code,
+        headers={REPLAY_HEADER: "true"},
+    )
+
+
+def store(db: Session, user_id: int, key: str, status_code: int, response) -> None:
+    """Записать ответ для повторов; фиксируется вместе с основной транзакцией"""
+    db.execute(
+        STORE_SQL,
+        {
+            "user_id": user_id,
+            "key": key,
+            "status_code": status_code,
+            "response": json.dumps(jsonable_encoder(response)),
+        },
+    )
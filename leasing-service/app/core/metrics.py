@@ -0,0 +1,186 @@
+"""
+Метрики сервиса в формате Prometheus (GET /metrics).
+
+- http_request_duration_seconds — гистограмма по методу, шаблону маршрута и статусу;
+- http_requests_in_flight — запросы в обработке;
+- http_compression_* — сжатые ответы и их объём до и после сжатия
+  (сэкономлено = input_bytes - output_bytes), см. compression.py;
+- db_pool_* — состояние пула соединений SQLAlchemy, выдачи соединений
+  и время, на которое запрос занимает соединение;
+- cache_* — попадания и промахи in-process кэшей (register_caches).
+
+Под gunicorn с несколькими воркерами (задан PROMETHEUS_MULTIPROC_DIR, см.
+gunicorn.conf.py) счётчики, гистограммы и gauge-метрики пишутся каждым
+воркером в файлы этого каталога, и /metrics суммирует их по всем воркерам
+(MultiProcessCollector). cache_* — состояние кэша того воркера, который
+обслужил запрос: кэши у воркеров свои.
+"""
+import os
+import time
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP-запросы в обработке", multiprocess_mode="livesum"
+)
+
+COMPRESSED_RESPONSES = Counter("http_compressed_responses", "Сжатые ответы", ["encoding"])
+COMPRESSION_INPUT = Counter(
+    "http_compression_input_bytes", "Байты тела ответа до сжатия", ["encoding"]
+)
+COMPRESSION_OUTPUT = Counter(
+    "http_compression_output_bytes", "Байты тела ответа после сжатия", ["encoding"]
+)
+
+POOL_CHECKOUTS = Counter("db_pool_checkouts", "Выдачи соединений из пула")
+POOL_CONNECTS = Counter("db_pool_connections_created", "Новые соединения с БД")
+POOL_HOLD = Histogram(
+    "db_pool_checkout_duration_seconds",
+    "Сколько соединение было занято запросом",
+    buckets=LATENCY_BUCKETS,
+)
+# Состояние пула обновляется по событиям пула (а не set_function при сборе):
+# в режиме multiprocess значения каждого воркера должны попасть в его файл.
+# livesum — сумма по живым воркерам
+POOL_SIZE = Gauge("db_pool_size", "Размер пула соединений", multiprocess_mode="livesum")
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Соединения, выданные из пула", multiprocess_mode="livesum"
+)
+POOL_CHECKED_IN = Gauge(
+    "db_pool_checked_in", "Свободные соединения в пуле", multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Соединения сверх размера пула (отрицательно, пока пул не заполнен)",
+    multiprocess_mode="livesum",
+)
+
+_collectors = []
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность по шаблону маршрута и число запросов в работе"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            # Шаблон пути (/api/v1/units/{unit_id}), а не сам путь — иначе
+            # число временных рядов росло бы с числом объектов
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+
+def instrument_engine(engine: Engine) -> None:
+    def update_pool_gauges(returning: bool = False):
+        # engine.pool читается заново: engine.dispose() (например, в воркере
+        # gunicorn после fork) подменяет пул новым
+        pool = engine.pool
+        checked_out, checked_in, overflow = pool.checkedout(), pool.checkedin(), pool.overflow()
+        if returning:
+            # Событие checkin приходит до возврата соединения в пул: в пул оно
+            # вернётся, если там есть место, иначе (сверх размера) закроется
+            checked_out -= 1
+            if checked_in < pool.size():
+                checked_in += 1
+            else:
+                overflow -= 1
+        POOL_SIZE.set(pool.size())
+        POOL_CHECKED_OUT.set(checked_out)
+        POOL_CHECKED_IN.set(checked_in)
+        POOL_OVERFLOW.set(overflow)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc()
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        update_pool_gauges()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            POOL_HOLD.observe(time.perf_counter() - started)
+        update_pool_gauges(returning=True)
+
+
+class CacheCollector:
+    """Счётчики кэшей из их stats(): hits, misses, size"""
+
+    def __init__(self, caches: dict):
+        self.caches = caches
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Попадания в кэш", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Промахи кэша", labels=["cache"])
+        size = GaugeMetricFamily("cache_size", "Записей в кэше", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Доля попаданий в кэш", labels=["cache"])
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            size.add_metric([name], stats["size"])
+            ratio.add_metric([name], stats["hit_rate"])
+        yield from (hits, misses, size, ratio)
+
+
+def register_caches(**caches) -> None:
+    collector = CacheCollector(caches)
+    _collectors.append(collector)
+    REGISTRY.register(collector)
+
+
+def metrics_response() -> Response:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in _collectors:
+            registry.register(collector)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -38,3 +38,28 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
         return CurrentUser(id=int(user_id), role=role)
     except JWTError:
         raise credentials_exception
+
+
+# Токен со списком помещений владельца выдаёт property-service
+# (GET /api/v1/properties/dashboard), подписывая его общим JWT-секретом
+UNITS_TOKEN_AUDIENCE = "units-summary"
+
+
+def decode_units_token(token: str, user_id: int) -> List[int]:
+    """id помещений из токена; токен должен быть выдан текущему пользователю"""
+    forbidden = HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Invalid units token",
+    )
+    try:
+        payload = jwt.decode(
+            token,
+            settings.JWT_SECRET_KEY,
+            algorithms=[settings.JWT_ALGORITHM],
+            audience=UNITS_TOKEN_AUDIENCE,
+        )
+    except JWTError:
+        raise forbidden
+    if payload.get("sub") != str(user_id):
+        raise forbidden
+    return [int(unit_id) for unit_id in payload.get("unit_ids", [])]
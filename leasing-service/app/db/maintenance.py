@@ -0,0 +1,164 @@
+"""
+Фоновое обслуживание БД leasing-service.
+
+MaintenanceWorker — поток, который при старте сервиса и затем раз в
+MAINTENANCE_INTERVAL_SECONDS выполняет зарегистрированные задачи. Ошибка
+задачи пишется в лог и не останавливает остальные: следующая попытка будет
+на следующем проходе.
+"""
+import logging
+import threading
+from datetime import date
+from typing import Callable, List
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def ensure_payment_partitions() -> None:
+    """Месячные секции leasing.payment с текущего месяца на PAYMENT_PARTITIONS_AHEAD_MONTHS вперёд"""
+    today = date.today()
+    with engine.begin() as conn:
+        created = conn.execute(
+            text("SELECT leasing.ensure_payment_partitions(:date_from, :date_to)"),
+            {
+                "date_from": today.replace(day=1),
+                "date_to": add_months(today, settings.PAYMENT_PARTITIONS_AHEAD_MONTHS),
+            },
+        ).scalar()
+    if created:
+        logger.info("Created %d leasing.payment partitions", created)
+
+
+# Пачка закрытых договоров, завершившихся раньше :cutoff (для договоров без
+# даты окончания — по времени последнего изменения, т.е. закрытия).
+# SKIP LOCKED: договоры, которые сейчас меняет запрос, уйдут в следующий проход
+ARCHIVE_BATCH_SQL = text(
+    """
+    SELECT id
+    FROM leasing.lease
+    WHERE status IN ('COMPLETED', 'CANCELLED')
+      AND COALESCE(end_date, updated_at::date) < :cutoff
+    ORDER BY id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+    """
+)
+
+ARCHIVE_LEASES_SQL = text(
+    """
+    INSERT INTO leasing.lease_archive
+        (id, unit_id, user_id, start_date, end_date, monthly_rent, status, created_at, updated_at)
+    SELECT id, unit_id, user_id, start_date, end_date, monthly_rent, status, created_at, updated_at
+    FROM leasing.lease
+    WHERE id = ANY(:ids)
+    """
+)
+
+ARCHIVE_PAYMENTS_SQL = text(
+    """
+    WITH moved AS (
+        DELETE FROM leasing.payment
+        WHERE lease_id = ANY(:ids)
+        RETURNING id, lease_id, payment_date, amount, status, method, created_at, updated_at
+    )
+    INSERT INTO leasing.payment_archive
+        (id, lease_id, payment_date, amount, status, method, created_at, updated_at)
+    SELECT * FROM moved
+    """
+)
+
+DELETE_LEASES_SQL = text("DELETE FROM leasing.lease WHERE id = ANY(:ids)")
+
+
+def archive_leases() -> None:
+    """Перенос закрытых договоров старше ARCHIVE_AFTER_MONTHS и их платежей в архив.
+
+    Каждая пачка из ARCHIVE_BATCH_SIZE договоров — отдельная короткая
+    транзакция: сначала копия договоров, затем перенос платежей, затем
+    удаление договоров из рабочей таблицы.
+    """
+    cutoff = add_months(date.today(), -settings.ARCHIVE_AFTER_MONTHS)
+    leases = payments = 0
+    for _ in range(settings.ARCHIVE_MAX_BATCHES):
+        with engine.begin() as conn:
+            ids = conn.execute(
+                ARCHIVE_BATCH_SQL, {"cutoff": cutoff, "limit": settings.ARCHIVE_BATCH_SIZE}
+            ).scalars().all()
+            if not ids:
+                break
+            conn.execute(ARCHIVE_LEASES_SQL, {"ids": ids})
+            payments += conn.execute(ARCHIVE_PAYMENTS_SQL, {"ids": ids}).rowcount
+            conn.execute(DELETE_LEASES_SQL, {"ids": ids})
+        leases += len(ids)
+        if len(ids) < settings.ARCHIVE_BATCH_SIZE:
+            break
+    if leases:
+        logger.info("Archived %d leases and %d payments closed before %s", leases, payments, cutoff)
+
+
+def expire_idempotency_keys() -> None:
+    """Удаление ключей Idempotency-Key старше IDEMPOTENCY_TTL_HOURS"""
+    with engine.begin() as conn:
+        deleted = conn.execute(
+            text(
+                "DELETE FROM leasing.idempotency "
+                "WHERE created_at < NOW() - make_interval(hours => :ttl)"
+            ),
+            {"ttl": settings.IDEMPOTENCY_TTL_HOURS},
+        ).rowcount
+    if deleted:
+        logger.info("Expired %d idempotency keys", deleted)
+
+
+class MaintenanceWorker:
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._jobs: List[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add_job(self, job: Callable[[], None]) -> None:
+        self._jobs.append(job)
+
+    def start(self) -> None:
+        if self._thread is not None or not self._jobs:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def run_once(self) -> None:
+        for job in self._jobs:
+            if self._stop.is_set():
+                return
+            try:
+                job()
+            except Exception:
+                logger.exception("Maintenance job %s failed", job.__name__)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self._interval)
+
+
+maintenance = MaintenanceWorker(settings.MAINTENANCE_INTERVAL_SECONDS)
+maintenance.add_job(ensure_payment_partitions)
+maintenance.add_job(archive_leases)
+maintenance.add_job(expire_idempotency_keys)
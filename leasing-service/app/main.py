@@ -1,14 +1,57 @@
 from fastapi import FastAPI
 from app.api.v1 import leases, payments
+from app.core.compression import CompressionMiddleware, parse_content_types
+from app.core.deadline import DeadlineMiddleware
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.tracing import TracingMiddleware
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.config import settings
+from app.db.session import engine
+from app.db.maintenance import maintenance
 
 app = FastAPI(title="Leasing Service", version="1.0.0")
 
+app.add_middleware(DeadlineMiddleware)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        level=settings.COMPRESSION_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        content_types=parse_content_types(settings.COMPRESSION_TYPES),
+    )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
 app.include_router(leases.router, prefix="/api/v1/leases", tags=["leases"])
 app.include_router(payments.router, prefix="/api/v1/payments", tags=["payments"])
 
 # Импортируем модели для Alembic (после создания app, чтобы избежать циклических импортов)
-from app.models.leasing import Lease, Payment  # noqa: F401
+from app.models.leasing import Lease, Payment, LeaseArchive, PaymentArchive  # noqa: F401
+
+@app.on_event("startup")
+def start_maintenance():
+    # Секции платежей на ближайшие месяцы (см. app/db/maintenance.py)
+    if settings.MAINTENANCE_ENABLED:
+        maintenance.start()
+
+
+@app.on_event("shutdown")
+def stop_maintenance():
+    maintenance.stop()
+
+
+@app.on_event("shutdown")
+def close_db_pool():
+    engine.dispose()
+
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
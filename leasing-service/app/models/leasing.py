@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric
+from sqlalchemy.schema import FetchedValue
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -19,18 +20,60 @@ class Lease(Base):
     status = Column(String(20), nullable=False)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())  # обновляет триггер в БД
 
 
 class Payment(Base):
     __tablename__ = "payment"
     __table_args__ = {"schema": "leasing"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
 
     lease_id = Column(Integer, nullable=False)
-    payment_date = Column(Date, nullable=False)
+    # Ключ секционирования: в БД первичный ключ (id, payment_date)
+    payment_date = Column(Date, primary_key=True, nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
     status = Column(String(20), nullable=False)
     method = Column(String(20), nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())  # обновляет триггер в БД
+
+
+class LeaseArchive(Base):
+    """Закрытые договоры, перенесённые из leasing.lease (id сохраняются)"""
+    __tablename__ = "lease_archive"
+    __table_args__ = {"schema": "leasing"}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+
+    unit_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False, index=True)
+
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=True)
+
+    monthly_rent = Column(Numeric(12, 2), nullable=False)
+    status = Column(String(20), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PaymentArchive(Base):
+    """Платежи архивных договоров"""
+    __tablename__ = "payment_archive"
+    __table_args__ = {"schema": "leasing"}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+
+    lease_id = Column(Integer, nullable=False, index=True)
+    payment_date = Column(Date, nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
+    status = Column(String(20), nullable=False)
+    method = Column(String(20), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
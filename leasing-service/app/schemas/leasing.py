@@ -42,4 +42,33 @@ class PaymentRead(PaymentBase):
 
 
 class LeaseWithPayments(LeaseRead):
-    payments: List[PaymentRead] = []
\ No newline at end of file
+    payments: List[PaymentRead] = []
+
+
+class DateRange(BaseModel):
+    start_date: date
+    end_date: date
+
+
+class UnitAvailability(BaseModel):
+    unit_id: int
+    free: List[DateRange] = []
+
+
+class LeaseSummaryRequest(BaseModel):
+    units_token: str
+
+
+class UnitLeaseSummary(BaseModel):
+    unit_id: int
+    active_leases: int = 0
+    payments_mtd_total: float = 0
+    payments_mtd_count: int = 0
+
+
+class LeaseSummary(BaseModel):
+    active_leases: int = 0
+    payments_mtd_total: float = 0
+    payments_mtd_count: int = 0
+    # только помещения, по которым есть действующие договоры или платежи
+    units: List[UnitLeaseSummary] = []
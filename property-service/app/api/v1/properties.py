@@ -1,57 +1,195 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Dict, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 
 from app.db.session import get_db
-from app.models.property import Property
-from app.schemas.property import PropertyCreate, PropertyRead, PropertyWithUnits
-from app.core.security import get_current_user, CurrentUser
+from app.db.notify import notify
+from app.models.property import Property, Unit
+from app.schemas.property import (
+    OwnerDashboard,
+    PropertyCreate,
+    PropertyRead,
+    PropertyWithUnits,
+)
+from app.core.security import get_current_user, CurrentUser, create_units_token
+from app.core.catalog_index import catalog_index, CHANNEL as CATALOG_CHANNEL
+from app.core.cache import property_cache, is_bypass
+from app.core.config import settings
+from app.core.deadline import is_deadline_error
+from app.core.http_cache import (
+    Versioned,
+    make_etag,
+    is_not_modified,
+    not_modified,
+    set_validators,
+)
 
 router = APIRouter()
 
 
+def versioned_property(prop: Property) -> Versioned:
+    return Versioned(
+        etag=make_etag("property", prop.id, prop.updated_at),
+        last_modified=prop.updated_at,
+        data=PropertyRead.from_orm(prop).dict(),
+    )
+
+
 @router.get("/public", response_model=List[PropertyRead])
 def list_properties_public(
     name: Optional[str] = Query(None, description="Фильтр по названию"),
     address: Optional[str] = Query(None, description="Фильтр по адресу"),
+    after_id: Optional[int] = Query(None, description="id последней записи предыдущей страницы"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_LIMIT),
     db: Session = Depends(get_db),
 ):
     """Публичный список всех объектов с фильтрацией"""
+    # Основной путь — in-memory индекс; SQL остаётся запасным вариантом,
+    # пока индекс не построен или запрос содержит спецсимволы ILIKE
+    if catalog_index.can_answer(name, address):
+        return catalog_index.search(name=name, address=address, after_id=after_id, limit=limit)
+
     query = db.query(Property)
     
     if name:
         query = query.filter(Property.name.ilike(f"%{name}%"))
     if address:
         query = query.filter(Property.address.ilike(f"%{address}%"))
-    
+    if after_id is not None:
+        query = query.filter(Property.id > after_id)
+
+    query = query.order_by(Property.id)
+    if limit is not None:
+        query = query.limit(limit)
     return query.all()
 
 
+@router.get("/suggest", response_model=List[str])
+def suggest_properties(
+    q: str = Query(..., min_length=1, max_length=100, description="Начало слова"),
+    field: Literal["name", "address"] = Query("name", description="Поле для подсказок"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Подсказки для фильтров каталога по префиксу слова (из in-memory индекса)"""
+    # Пока индекс не построен, подсказок нет — в БД за ними не ходим
+    if not catalog_index.ready:
+        return []
+    return catalog_index.suggest(q, field=field, limit=limit)
+
+
+@router.get("/index/stats")
+def catalog_index_stats():
+    """Состояние и потребление памяти индекса каталога"""
+    return catalog_index.stats()
+
+
+@router.get("/dashboard", response_model=OwnerDashboard)
+def owner_dashboard(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Объекты владельца со счётчиками помещений по статусам — один запрос к БД"""
+    rows = (
+        db.query(
+            Property,
+            Unit.status,
+            func.count(Unit.id),
+            func.array_agg(Unit.id),
+        )
+        .outerjoin(Unit, Unit.property_id == Property.id)
+        .filter(Property.user_id == current_user.id)
+        .group_by(Property.id, Unit.status)
+        .order_by(Property.id)
+        .all()
+    )
+
+    properties = {}
+    units_by_status: Dict[str, int] = {}
+    unit_ids: List[int] = []
+    for prop, unit_status, count, ids in rows:
+        item = properties.setdefault(
+            prop.id,
+            {**PropertyRead.from_orm(prop).dict(), "units_total": 0, "units_by_status": {}, "unit_ids": []},
+        )
+        # у объекта без помещений LEFT JOIN даёт одну строку со статусом NULL
+        if unit_status is None:
+            continue
+        item["units_total"] += count
+        item["units_by_status"][unit_status] = count
+        item["unit_ids"].extend(ids)
+        units_by_status[unit_status] = units_by_status.get(unit_status, 0) + count
+        unit_ids.extend(ids)
+
+    return {
+        "properties": list(properties.values()),
+        "units_total": len(unit_ids),
+        "units_by_status": units_by_status,
+        "units_token": create_units_token(current_user.id, sorted(unit_ids)),
+    }
+
+
 @router.get("/", response_model=List[PropertyRead])
 def list_properties(
+    request: Request,
+    response: Response,
+    after_id: Optional[int] = Query(None, description="id последней записи предыдущей страницы"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_LIMIT),
     db: Session = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """Получить список объектов текущего пользователя"""
-    properties = db.query(Property).filter(Property.user_id == current_user.id).all()
-    return properties
+    # Версия списка — количество строк и максимальный updated_at;
+    # при совпадении ETag сами строки не загружаются
+    count, last_modified = (
+        db.query(func.count(Property.id), func.max(Property.updated_at))
+        .filter(Property.user_id == current_user.id)
+        .one()
+    )
+    etag = make_etag("properties", current_user.id, after_id, limit, count, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+
+    query = db.query(Property).filter(Property.user_id == current_user.id)
+    if after_id is not None:
+        query = query.filter(Property.id > after_id)
+    query = query.order_by(Property.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 
 @router.get("/{property_id}", response_model=PropertyRead)
 def get_property(
     property_id: int,
+    request: Request,
+    response: Response,
+    x_cache_bypass: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """Получить информацию об объекте (публичный доступ)"""
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
-    if not property_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Property not found"
-        )
-    return property_obj
+    def load():
+        property_obj = db.query(Property).filter(Property.id == property_id).first()
+        if not property_obj:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Property not found"
+            )
+        return versioned_property(property_obj)
+
+    entry, cache_state = property_cache.get_or_load(
+        property_id, load, bypass=is_bypass(x_cache_bypass, authorization)
+    )
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        result = not_modified(entry.etag, entry.last_modified)
+        result.headers["X-Cache"] = cache_state
+        return result
+    set_validators(response, entry.etag, entry.last_modified)
+    response.headers["X-Cache"] = cache_state
+    return entry.data
 
 
 @router.post("/", response_model=PropertyRead, status_code=status.HTTP_201_CREATED)
@@ -69,17 +207,27 @@ def create_property(
             property_type=prop_in.property_type,
         )
         db.add(prop)
+        db.flush()
+        # Остальные экземпляры обновят свой индекс по NOTIFY после commit
+        notify(db, CATALOG_CHANNEL, str(prop.id))
         db.commit()
         db.refresh(prop)
+        catalog_index.upsert(prop)
+        property_cache.set(prop.id, versioned_property(prop))
         return prop
     except SQLAlchemyError as e:
         db.rollback()
+        # Дедлайн запроса (в т.ч. statement_timeout) — 504 от DeadlineMiddleware
+        if is_deadline_error(e):
+            raise
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}"
         )
     except Exception as e:
         db.rollback()
+        if is_deadline_error(e):
+            raise
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating property: {str(e)}"
@@ -1,18 +1,48 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
+from app.db.notify import notify
 from app.models.property import Unit, Property
-from app.schemas.property import UnitCreate, UnitRead
+from app.schemas.property import (
+    UnitCreate,
+    UnitRead,
+    UnitSearchItem,
+    UnitSearchPage,
+    UnitSearchFacets,
+    FacetCount,
+    RentBucketCount,
+)
 from app.core.security import get_current_user, CurrentUser
+from app.core.config import settings
+from app.core.cache import unit_cache, is_bypass, UNIT_CHANNEL
+from app.core.http_cache import (
+    Versioned,
+    make_etag,
+    is_not_modified,
+    not_modified,
+    set_validators,
+)
 from sqlalchemy.exc import IntegrityError
 
 router = APIRouter()
 
 
+def versioned_unit(unit: Unit) -> Versioned:
+    return Versioned(
+        etag=make_etag("unit", unit.id, unit.updated_at),
+        last_modified=unit.updated_at,
+        data=UnitRead.from_orm(unit).dict(),
+    )
+
+
 @router.get("/public", response_model=List[UnitRead])
 def list_units_public(
+    request: Request,
+    response: Response,
     property_id: int = Query(..., description="ID объекта"),
     db: Session = Depends(get_db),
 ):
@@ -23,22 +53,151 @@ def list_units_public(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Property not found"
         )
-    
-    units = db.query(Unit).filter(
-        Unit.property_id == property_id,
-        Unit.status == "AVAILABLE"
-    ).all()
+
+    filters = (Unit.property_id == property_id, Unit.status == "AVAILABLE")
+    count, last_modified = (
+        db.query(func.count(Unit.id), func.max(Unit.updated_at)).filter(*filters).one()
+    )
+    etag = make_etag("units_public", property_id, count, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+
+    units = db.query(Unit).filter(*filters).all()
     return units
 
 
+def _encode_cursor(unit: Unit) -> str:
+    return f"{unit.monthly_rent}_{unit.id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[Decimal, int]:
+    try:
+        rent, unit_id = cursor.split("_", 1)
+        return Decimal(rent), int(unit_id)
+    except (ValueError, InvalidOperation):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+@router.get("/search", response_model=UnitSearchPage)
+def search_units(
+    min_rent: Optional[float] = Query(None, description="Минимальная аренда"),
+    max_rent: Optional[float] = Query(None, description="Максимальная аренда"),
+    min_area: Optional[float] = Query(None, description="Минимальная площадь"),
+    max_area: Optional[float] = Query(None, description="Максимальная площадь"),
+    floor: Optional[int] = Query(None, description="Этаж"),
+    property_type: Optional[str] = Query(None, description="Тип объекта"),
+    status_value: str = Query("AVAILABLE", alias="status", description="Статус помещения"),
+    limit: int = Query(20, ge=1, le=settings.UNIT_SEARCH_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    facets: bool = Query(False, description="Вернуть счётчики фасетов (только для первой страницы)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Публичный поиск помещений по всем объектам.
+
+    Фасеты (facets=true) считаются по первым UNIT_SEARCH_FACET_LIMIT
+    подходящим помещениям, а не по всей выборке: при широком фильтре
+    счётчики неполные, о чём говорит facets.truncated.
+    """
+    # Фильтр по статусу всегда присутствует и идёт первым — запрос опирается
+    # на индексы (status, monthly_rent, id) и частичный индекс по AVAILABLE
+    filters = [Unit.status == status_value]
+    if min_rent is not None:
+        filters.append(Unit.monthly_rent >= min_rent)
+    if max_rent is not None:
+        filters.append(Unit.monthly_rent <= max_rent)
+    if min_area is not None:
+        filters.append(Unit.area >= min_area)
+    if max_area is not None:
+        filters.append(Unit.area <= max_area)
+    if floor is not None:
+        filters.append(Unit.floor == floor)
+    if property_type:
+        filters.append(Property.property_type == property_type)
+
+    query = (
+        db.query(Unit, Property.name, Property.property_type)
+        .join(Property, Unit.property_id == Property.id)
+        .filter(*filters)
+    )
+    if cursor:
+        after_rent, after_id = _decode_cursor(cursor)
+        query = query.filter(tuple_(Unit.monthly_rent, Unit.id) > tuple_(after_rent, after_id))
+
+    # Keyset-пагинация: берём на одну запись больше, чтобы понять, есть ли продолжение
+    rows = query.order_by(Unit.monthly_rent, Unit.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [
+        UnitSearchItem(
+            **UnitRead.from_orm(unit).dict(),
+            property_name=property_name,
+            property_type=prop_type,
+        )
+        for unit, property_name, prop_type in rows
+    ]
+    next_cursor = _encode_cursor(rows[-1][0]) if has_more else None
+
+    facet_counts = None
+    if facets and not cursor:
+        # Ограниченная подвыборка: GROUP BY не проходит весь отфильтрованный набор
+        facet_limit = settings.UNIT_SEARCH_FACET_LIMIT
+        matched = (
+            db.query(Property.property_type.label("property_type"), Unit.monthly_rent.label("monthly_rent"))
+            .join(Property, Unit.property_id == Property.id)
+            .filter(*filters)
+            .limit(facet_limit + 1)
+            .subquery()
+        )
+        type_rows = (
+            db.query(matched.c.property_type, func.count())
+            .group_by(matched.c.property_type)
+            .order_by(matched.c.property_type)
+            .all()
+        )
+        bucket_size = settings.UNIT_SEARCH_RENT_BUCKET
+        bucket = func.floor(matched.c.monthly_rent / bucket_size)
+        bucket_rows = (
+            db.query(bucket.label("bucket"), func.count())
+            .group_by("bucket")
+            .order_by("bucket")
+            .all()
+        )
+        facet_counts = UnitSearchFacets(
+            property_type=[
+                FacetCount(value=value, count=count) for value, count in type_rows
+            ],
+            rent_bucket=[
+                RentBucketCount(
+                    min_rent=float(b) * bucket_size,
+                    max_rent=float(b + 1) * bucket_size,
+                    count=count,
+                )
+                for b, count in bucket_rows
+            ],
+            truncated=sum(count for _, count in type_rows) > facet_limit,
+        )
+
+    return UnitSearchPage(items=items, next_cursor=next_cursor, facets=facet_counts)
+
+
 @router.get("/", response_model=List[UnitRead])
 def list_units(
+    request: Request,
+    response: Response,
     property_id: int | None = None,
+    after_id: Optional[int] = Query(None, description="id последней записи предыдущей страницы"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_LIMIT),
     db: Session = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """Получить список помещений текущего пользователя"""
-    query = db.query(Unit).join(Property).filter(Property.user_id == current_user.id)
+    filters = [Property.user_id == current_user.id]
     
     if property_id is not None:
         property_obj = db.query(Property).filter(
@@ -50,8 +209,25 @@ def list_units(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Property not found or access denied"
             )
-        query = query.filter(Unit.property_id == property_id)
-    
+        filters.append(Unit.property_id == property_id)
+
+    count, last_modified = (
+        db.query(func.count(Unit.id), func.max(Unit.updated_at))
+        .join(Property)
+        .filter(*filters)
+        .one()
+    )
+    etag = make_etag("units", current_user.id, property_id, after_id, limit, count, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+
+    query = db.query(Unit).join(Property).filter(*filters)
+    if after_id is not None:
+        query = query.filter(Unit.id > after_id)
+    query = query.order_by(Unit.id)
+    if limit is not None:
+        query = query.limit(limit)
     return query.all()
 
 
@@ -82,6 +258,8 @@ def create_unit(
     )
     db.add(unit)
     try:
+        db.flush()
+        notify(db, UNIT_CHANNEL, str(unit.id))
         db.commit()
     except IntegrityError:
         db.rollback()
@@ -90,23 +268,40 @@ def create_unit(
             detail="Unit with this number already exists in this property",
         )
     db.refresh(unit)
+    unit_cache.set(unit.id, versioned_unit(unit))
     return unit
 
 
 @router.get("/public/{unit_id}", response_model=UnitRead)
 def get_unit_public(
     unit_id: int,
+    request: Request,
+    response: Response,
+    x_cache_bypass: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """Получить информацию о помещении (публичный доступ)"""
-    unit = db.query(Unit).filter(Unit.id == unit_id).first()
-    
-    if not unit:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Unit not found"
-        )
-    return unit
+    def load():
+        unit = db.query(Unit).filter(Unit.id == unit_id).first()
+
+        if not unit:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Unit not found"
+            )
+        return versioned_unit(unit)
+
+    entry, cache_state = unit_cache.get_or_load(
+        unit_id, load, bypass=is_bypass(x_cache_bypass, authorization)
+    )
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        result = not_modified(entry.etag, entry.last_modified)
+        result.headers["X-Cache"] = cache_state
+        return result
+    set_validators(response, entry.etag, entry.last_modified)
+    response.headers["X-Cache"] = cache_state
+    return entry.data
 
 
 @router.get("/{unit_id}", response_model=UnitRead)
@@ -149,6 +344,8 @@ def update_unit_status(
         )
     
     unit.status = status_value
+    notify(db, UNIT_CHANNEL, str(unit.id))
     db.commit()
     db.refresh(unit)
+    unit_cache.set(unit.id, versioned_unit(unit))
     return unit
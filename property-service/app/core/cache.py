@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import user_from_authorization
+
+CACHE_HIT = "HIT"
+CACHE_MISS = "MISS"
+CACHE_BYPASS = "BYPASS"
+
+
+class TTLCache:
+    """Потокобезопасный LRU-кэш с ограничением размера и временем жизни записей"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(
+        self, key: Hashable, loader: Callable[[], Any], bypass: bool = False
+    ) -> Tuple[Any, str]:
+        """
+        Значение из кэша или от loader. При bypass кэш не читается,
+        но свежее значение в него записывается.
+        """
+        if not bypass:
+            value = self.get(key)
+            if value is not None:
+                return value, CACHE_HIT
+        value = loader()
+        self.set(key, value)
+        return value, CACHE_BYPASS if bypass else CACHE_MISS
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+property_cache = TTLCache("property", settings.READ_CACHE_SIZE, settings.READ_CACHE_TTL)
+unit_cache = TTLCache("unit", settings.READ_CACHE_SIZE, settings.READ_CACHE_TTL)
+
+UNIT_CHANNEL = "unit_changed"
+
+
+def is_bypass(header_value: Optional[str], authorization: Optional[str] = None) -> bool:
+    """
+    X-Cache-Bypass учитывается только в режиме DEBUG или от администратора:
+    иначе любой клиент мог бы каждым запросом отправлять чтение в БД
+    """
+    if header_value is None or header_value.lower() not in ("1", "true", "yes"):
+        return False
+    if settings.DEBUG:
+        return True
+    user = user_from_authorization(authorization)
+    return user is not None and user.role == "ADMIN"
+
+
+def invalidate_unit(payload: str) -> None:
+    """Обработчик NOTIFY unit_changed: payload — id помещения"""
+    unit_cache.invalidate(int(payload))
+
+
+def invalidate_property(payload: str) -> None:
+    """Обработчик NOTIFY property_changed: payload — id объекта"""
+    property_cache.invalidate(int(payload))
@@ -0,0 +1,273 @@
+import bisect
+import logging
+import sys
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.property import Property
+from app.schemas.property import PropertyRead
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "property_changed"
+SEARCH_FIELDS = ("name", "address")
+
+
+def _trigrams(value: str) -> Set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def _word_suffixes(value: str) -> List[str]:
+    """Суффиксы строки, начинающиеся с начала слова: 'ул. ленина 5' -> ['ул. ленина 5', 'ленина 5', '5']"""
+    return [
+        value[i:]
+        for i, ch in enumerate(value)
+        if ch.isalnum() and (i == 0 or not value[i - 1].isalnum())
+    ]
+
+
+def _deep_sizeof(obj, seen: Optional[Set[int]] = None) -> int:
+    """Приблизительный размер объекта в памяти вместе с вложенными контейнерами"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def _inserted(ids: List[int], doc_id: int) -> List[int]:
+    """Копия отсортированного массива с doc_id (исходный могут читать без блокировки)"""
+    i = bisect.bisect_left(ids, doc_id)
+    if i < len(ids) and ids[i] == doc_id:
+        return ids
+    return ids[:i] + [doc_id] + ids[i:]
+
+
+def _removed(ids: List[int], doc_id: int) -> List[int]:
+    i = bisect.bisect_left(ids, doc_id)
+    if i < len(ids) and ids[i] == doc_id:
+        return ids[:i] + ids[i + 1:]
+    return ids
+
+
+class CatalogIndex:
+    """
+    In-process триграммный инвертированный индекс по Property.name и Property.address.
+    Повторяет семантику ILIKE '%q%': кандидаты берутся из самого короткого
+    списка по триграммам запроса, затем проверяется вхождение подстроки.
+
+    id документов и списки по триграммам — отсортированные массивы: страница
+    keyset-пагинации начинается с bisect по after_id, а подстрока проверяется
+    только до набора limit совпадений. Массивы не меняются на месте (при
+    изменении документа заменяются копией), поэтому поиск берёт ссылки на них
+    под блокировкой, а проверяет подстроки уже без неё.
+
+    Для автодополнения рядом хранится отсортированный массив уникальных пар
+    (суффикс с начала слова, значение) на каждое поле и счётчик документов
+    для каждой пары: поиск по префиксу — bisect и проход, пока не набрано
+    limit значений; пара удаляется из массива, когда счётчик доходит до нуля.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs: Dict[int, dict] = {}
+        self._lowered: Dict[int, Dict[str, str]] = {}
+        self._ids: List[int] = []
+        self._postings: Dict[str, Dict[str, List[int]]] = {
+            field: defaultdict(list) for field in SEARCH_FIELDS
+        }
+        self._prefixes: Dict[str, List[Tuple[str, str]]] = {
+            field: [] for field in SEARCH_FIELDS
+        }
+        self._prefix_refs: Dict[str, Dict[Tuple[str, str], int]] = {
+            field: defaultdict(int) for field in SEARCH_FIELDS
+        }
+        self.ready = False
+
+    def build(self, db: Session) -> None:
+        """Полностью перестроить индекс по таблице property"""
+        docs = [PropertyRead.from_orm(p).dict() for p in db.query(Property).yield_per(1000)]
+        docs.sort(key=lambda doc: doc["id"])
+        fresh = CatalogIndex()
+        for doc in docs:
+            # документы идут по возрастанию id, поэтому списки остаются
+            # отсортированными при добавлении в конец
+            fresh._add(doc, bulk=True)
+        for entries in fresh._prefixes.values():
+            entries.sort()
+        with self._lock:
+            self._docs = fresh._docs
+            self._lowered = fresh._lowered
+            self._ids = fresh._ids
+            self._postings = fresh._postings
+            self._prefixes = fresh._prefixes
+            self._prefix_refs = fresh._prefix_refs
+            self.ready = True
+        logger.info("Catalog index built: %d properties", len(docs))
+
+    def upsert(self, prop: Property) -> None:
+        doc = PropertyRead.from_orm(prop).dict()
+        with self._lock:
+            self._remove(doc["id"])
+            self._add(doc)
+
+    def remove(self, property_id: int) -> None:
+        with self._lock:
+            self._remove(property_id)
+
+    def can_answer(self, *queries: Optional[str]) -> bool:
+        # '%' и '_' в ILIKE — спецсимволы; такие запросы отдаём в SQL
+        return self.ready and not any(q and ("%" in q or "_" in q) for q in queries)
+
+    def search(
+        self,
+        name: Optional[str] = None,
+        address: Optional[str] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        queries = [
+            (field, query.lower()) for field, query in (("name", name), ("address", address)) if query
+        ]
+        with self._lock:
+            docs, lowered = self._docs, self._lowered
+            source = self._ids
+            for field, query in queries:
+                for gram in _trigrams(query):
+                    ids = self._postings[field].get(gram)
+                    if not ids:
+                        return []
+                    if len(ids) < len(source):
+                        source = ids
+
+        result: List[dict] = []
+        i = bisect.bisect_right(source, after_id) if after_id is not None else 0
+        while i < len(source) and (limit is None or len(result) < limit):
+            doc_id = source[i]
+            i += 1
+            values, doc = lowered.get(doc_id), docs.get(doc_id)
+            # документ удалён после того, как взяты ссылки на массивы
+            if values is None or doc is None:
+                continue
+            if all(query in values[field] for field, query in queries):
+                result.append(doc)
+        return result
+
+    def suggest(self, query: str, field: str = "name", limit: int = 10) -> List[str]:
+        """Уникальные значения поля, у которых какое-либо слово начинается с query"""
+        query = query.lower()
+        result: List[str] = []
+        seen: Set[str] = set()
+        with self._lock:
+            entries = self._prefixes[field]
+            i = bisect.bisect_left(entries, (query,))
+            while i < len(entries) and len(result) < limit:
+                key, value = entries[i]
+                if not key.startswith(query):
+                    break
+                # одно значение встречается под несколькими суффиксами
+                if value not in seen:
+                    seen.add(value)
+                    result.append(value)
+                i += 1
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "documents": len(self._docs),
+                "trigrams": {field: len(p) for field, p in self._postings.items()},
+                "postings": {
+                    field: sum(len(ids) for ids in p.values())
+                    for field, p in self._postings.items()
+                },
+                "prefix_entries": {field: len(e) for field, e in self._prefixes.items()},
+                "memory_bytes": _deep_sizeof(self._docs)
+                + _deep_sizeof(self._lowered)
+                + _deep_sizeof(self._postings)
+                + _deep_sizeof(self._prefixes),
+            }
+
+    def _add(self, doc: dict, bulk: bool = False) -> None:
+        doc_id = doc["id"]
+        lowered = {field: (doc[field] or "").lower() for field in SEARCH_FIELDS}
+        if bulk:
+            self._ids.append(doc_id)
+        else:
+            self._ids = _inserted(self._ids, doc_id)
+        for field, value in lowered.items():
+            postings = self._postings[field]
+            for gram in _trigrams(value):
+                if bulk:
+                    postings[gram].append(doc_id)
+                else:
+                    postings[gram] = _inserted(postings.get(gram, []), doc_id)
+            entries = self._prefixes[field]
+            refs = self._prefix_refs[field]
+            for suffix in set(_word_suffixes(value)):
+                entry = (suffix, doc[field])
+                refs[entry] += 1
+                if refs[entry] > 1:
+                    continue
+                if bulk:
+                    entries.append(entry)
+                else:
+                    bisect.insort(entries, entry)
+        self._lowered[doc_id] = lowered
+        self._docs[doc_id] = doc
+
+    def _remove(self, doc_id: int) -> None:
+        lowered = self._lowered.pop(doc_id, None)
+        doc = self._docs.pop(doc_id, None)
+        if lowered is None:
+            return
+        for field, value in lowered.items():
+            entries = self._prefixes[field]
+            refs = self._prefix_refs[field]
+            for suffix in set(_word_suffixes(value)):
+                entry = (suffix, doc[field])
+                refs[entry] -= 1
+                if refs[entry] > 0:
+                    continue
+                del refs[entry]
+                i = bisect.bisect_left(entries, entry)
+                if i < len(entries) and entries[i] == entry:
+                    del entries[i]
+            postings = self._postings[field]
+            for gram in _trigrams(value):
+                ids = _removed(postings.get(gram, []), doc_id)
+                if ids:
+                    postings[gram] = ids
+                else:
+                    postings.pop(gram, None)
+        self._ids = _removed(self._ids, doc_id)
+
+
+catalog_index = CatalogIndex()
+
+
+def rebuild_catalog_index() -> None:
+    with SessionLocal() as db:
+        catalog_index.build(db)
+
+
+def refresh_property(payload: str) -> None:
+    """Обработчик NOTIFY property_changed: payload — id изменённого объекта"""
+    property_id = int(payload)
+    with SessionLocal() as db:
+        prop = db.get(Property, property_id)
+        if prop is None:
+            catalog_index.remove(property_id)
+        else:
+            catalog_index.upsert(prop)
@@ -2,8 +2,34 @@ from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "postgresql://rental_user:rental_pass@db:5432/rental_db"
+    # Пул соединений одного процесса; под gunicorn задаются из
+    # DB_CONNECTION_BUDGET (gunicorn.conf.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
     JWT_SECRET_KEY: str = "Project_secret_key"
     JWT_ALGORITHM: str = "HS256"
+    LIST_MAX_LIMIT: int = 1000
+    UNIT_SEARCH_MAX_LIMIT: int = 100
+    UNIT_SEARCH_RENT_BUCKET: int = 10000
+    # Фасеты считаются не больше чем по стольким подходящим помещениям
+    UNIT_SEARCH_FACET_LIMIT: int = 10000
+    CATALOG_INDEX_ENABLED: bool = True
+    READ_CACHE_SIZE: int = 10000
+    READ_CACHE_TTL: float = 30.0
+    UNITS_TOKEN_TTL: int = 300
+    DEBUG: bool = False
+    QUERY_COUNT_WARN_THRESHOLD: int = 20
+    QUERY_REPEAT_WARN_THRESHOLD: int = 5
+    SERVICE_NAME: str = "property-service"
+    TRACE_FILE: str = ""
+    # Сжатие ответов (app/core/compression.py). Ответы читает фронтенд по
+    # внутренней сети, поэтому уровень минимальный: почти весь выигрыш для JSON
+    # при минимальной цене в CPU
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 1
+    COMPRESSION_BROTLI_QUALITY: int = 1
+    COMPRESSION_TYPES: str = "application/json,text/plain"
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,111 @@
+"""
+Дедлайн запроса, переданный вызывающим сервисом.
+
+Фронтенд передаёт оставшийся бюджет времени в заголовке X-Request-Timeout-Ms.
+DeadlineMiddleware отвечает 504 на уже просроченные запросы, а на время
+обработки запоминает дедлайн: каждая транзакция получает
+SET LOCAL statement_timeout по оставшемуся времени, и брошенная вызывающей
+стороной работа не продолжает занимать БД. Запрос, отменённый по
+statement_timeout, тоже завершается 504. Такой 504 помечен заголовком
+X-Deadline-Exceeded: вызывающая сторона отличает его от сбоя шлюза и не
+считает ошибкой бэкенда.
+"""
+import json
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from psycopg2 import errors as pg_errors
+from sqlalchemy.exc import DBAPIError
+
+DEADLINE_HEADER = b"x-request-timeout-ms"
+EXCEEDED_HEADER = b"x-deadline-exceeded"
+# Запас на сериализацию ответа и обратный путь по сети
+DEADLINE_MARGIN_MS = 20
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени запроса исчерпан"""
+
+
+def remaining_ms() -> Optional[int]:
+    """Сколько миллисекунд осталось у текущего запроса (None — дедлайна нет)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return int((deadline - time.monotonic()) * 1000)
+
+
+def set_statement_timeout(session, transaction, connection) -> None:
+    """Обработчик after_begin сессии: ограничить транзакцию остатком бюджета"""
+    remaining = remaining_ms()
+    if remaining is None:
+        return
+    if remaining <= 0:
+        raise DeadlineExceeded()
+    # SET LOCAL действует до конца транзакции и не «протекает» в пул
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining}")
+
+
+def is_deadline_error(exc: BaseException) -> bool:
+    if isinstance(exc, DeadlineExceeded):
+        return True
+    return isinstance(exc, DBAPIError) and isinstance(exc.orig, pg_errors.QueryCanceled)
+
+
+async def _send_timeout(send) -> None:
+    body = json.dumps({"detail": "Request deadline exceeded"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 504,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (EXCEEDED_HEADER, b"1"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class DeadlineMiddleware:
+    """ASGI-middleware, соблюдающее дедлайн из заголовка X-Request-Timeout-Ms"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = dict(scope["headers"]).get(DEADLINE_HEADER)
+        try:
+            budget_ms = int(header) if header is not None else None
+        except ValueError:
+            budget_ms = None
+        if budget_ms is None:
+            await self.app(scope, receive, send)
+            return
+        if budget_ms <= DEADLINE_MARGIN_MS:
+            await _send_timeout(send)
+            return
+
+        started = False
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        token = _deadline.set(time.monotonic() + (budget_ms - DEADLINE_MARGIN_MS) / 1000)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            if started or not is_deadline_error(exc):
+                raise
+            await _send_timeout(send)
+        finally:
+            _deadline.reset(token)
@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -38,3 +39,31 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
         return CurrentUser(id=int(user_id), role=role)
     except JWTError:
         raise credentials_exception
+
+
+def user_from_authorization(authorization: Optional[str]) -> Optional[CurrentUser]:
+    """Пользователь из заголовка Authorization для публичных эндпоинтов; None, если токена нет или он невалиден"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return get_current_user(token)
+    except HTTPException:
+        return None
+
+
+# Аудитория токена со списком помещений владельца. Токен подписан общим
+# JWT-секретом: leasing-service по нему отдаёт сводку только по тем
+# помещениям, которые property-service подтвердил как принадлежащие
+# пользователю. Без claim role он не годится как токен доступа.
+UNITS_TOKEN_AUDIENCE = "units-summary"
+
+
+def create_units_token(user_id: int, unit_ids: List[int]) -> str:
+    payload = {
+        "sub": str(user_id),
+        "aud": UNITS_TOKEN_AUDIENCE,
+        "unit_ids": unit_ids,
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=settings.UNITS_TOKEN_TTL),
+    }
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
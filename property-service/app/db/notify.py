@@ -0,0 +1,99 @@
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+def notify(db: Session, channel: str, payload: str) -> None:
+    """Отправить NOTIFY в текущей транзакции (доставляется после commit)"""
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": payload},
+    )
+
+
+class NotifyListener:
+    """
+    Фоновый поток, слушающий каналы Postgres LISTEN/NOTIFY.
+    Использует отдельное соединение вне пула SQLAlchemy и переподключается
+    при обрыве. После каждого подключения вызываются on_connect-обработчики,
+    чтобы подписчики могли (пере)синхронизироваться: уведомления за время
+    простоя теряются.
+    """
+
+    def __init__(self, engine: Engine, poll_interval: float = 1.0, reconnect_delay: float = 5.0):
+        self._dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._poll_interval = poll_interval
+        self._reconnect_delay = reconnect_delay
+        self._handlers: Dict[str, List[Callable[[str], None]]] = defaultdict(list)
+        self._connect_handlers: List[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]) -> None:
+        self._handlers[channel].append(handler)
+
+    def on_connect(self, handler: Callable[[], None]) -> None:
+        self._connect_handlers.append(handler)
+
+    def start(self) -> None:
+        if self._thread is not None or not self._handlers:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pg-notify-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._poll_interval * 2)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self._dsn)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    for channel in self._handlers:
+                        cur.execute(f'LISTEN "{channel}"')
+                for handler in self._connect_handlers:
+                    self._call(handler)
+
+                while not self._stop.is_set():
+                    ready, _, _ = select.select([conn], [], [], self._poll_interval)
+                    if not ready:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        message = conn.notifies.pop(0)
+                        for handler in self._handlers.get(message.channel, []):
+                            self._call(handler, message.payload)
+            except Exception:
+                logger.exception("LISTEN connection lost, reconnecting in %.1fs", self._reconnect_delay)
+                self._stop.wait(self._reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    @staticmethod
+    def _call(handler: Callable, *args) -> None:
+        try:
+            handler(*args)
+        except Exception:
+            logger.exception("NOTIFY handler %r failed", handler)
+
+
+listener = NotifyListener(engine)
@@ -1,10 +1,30 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.deadline import set_statement_timeout
+from app.core.metrics import instrument_engine
+from app.core import query_stats, tracing
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+)
+instrument_engine(engine)
+
+# Число SQL и время в БД на каждый HTTP-запрос (см. app/core/query_stats.py)
+# и span на каждый SQL в трассе запроса (см. app/core/tracing.py)
+for hooks in (query_stats, tracing):
+    event.listen(engine, "before_cursor_execute", hooks.before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", hooks.after_cursor_execute)
+    event.listen(engine, "handle_error", hooks.handle_error)
 
-engine = create_engine(settings.DATABASE_URL, future=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Каждая транзакция ограничена оставшимся временем запроса (см. app/core/deadline.py)
+event.listen(SessionLocal, "after_begin", set_statement_timeout)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -1,14 +1,80 @@
 from fastapi import FastAPI
 from app.api.v1 import properties, units
+from app.core.compression import CompressionMiddleware, parse_content_types
+from app.core.deadline import DeadlineMiddleware
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.tracing import TracingMiddleware
+from app.core.metrics import MetricsMiddleware, metrics_response, register_caches
+from app.core.config import settings
+from app.db.session import engine
+from app.core.catalog_index import CHANNEL, rebuild_catalog_index, refresh_property
+from app.core.cache import (
+    UNIT_CHANNEL,
+    property_cache,
+    unit_cache,
+    invalidate_property,
+    invalidate_unit,
+)
+from app.db.notify import listener
 
 app = FastAPI(title="Property Service", version="1.0.0")
 
+app.add_middleware(DeadlineMiddleware)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        level=settings.COMPRESSION_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        content_types=parse_content_types(settings.COMPRESSION_TYPES),
+    )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
+register_caches(property=property_cache, unit=unit_cache)
+
 app.include_router(properties.router, prefix="/api/v1/properties", tags=["properties"])
 app.include_router(units.router, prefix="/api/v1/units", tags=["units"])
 
 # Импортируем модели для Alembic (после создания app, чтобы избежать циклических импортов)
 from app.models.property import Property, Unit  # noqa: F401
 
+@app.on_event("startup")
+def start_background_sync():
+    # Индекс каталога строится при первом подключении слушателя LISTEN
+    # и перестраивается после каждого переподключения
+    if settings.CATALOG_INDEX_ENABLED:
+        listener.subscribe(CHANNEL, refresh_property)
+        listener.on_connect(rebuild_catalog_index)
+    listener.subscribe(CHANNEL, invalidate_property)
+    listener.subscribe(UNIT_CHANNEL, invalidate_unit)
+    # Пропущенные за время обрыва уведомления — повод сбросить кэши целиком
+    listener.on_connect(property_cache.clear)
+    listener.on_connect(unit_cache.clear)
+    listener.start()
+
+
+@app.on_event("shutdown")
+def stop_background_sync():
+    listener.stop()
+
+
+@app.on_event("shutdown")
+def close_db_pool():
+    engine.dispose()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {cache.name: cache.stats() for cache in (property_cache, unit_cache)}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
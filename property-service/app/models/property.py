@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey
+from sqlalchemy.schema import FetchedValue
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -15,6 +16,7 @@ class Property(Base):
     description = Column(Text)
     property_type = Column(String(50), nullable=False)  # APARTMENT, HOUSE, OFFICE и т.п.
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())  # обновляет триггер в БД
 
     units = relationship("Unit", back_populates="property")
 
@@ -31,5 +33,6 @@ class Unit(Base):
     status = Column(String(20), nullable=False, default="AVAILABLE")
     monthly_rent = Column(Numeric(12, 2), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())  # обновляет триггер в БД
 
     property = relationship("Property", back_populates="units")
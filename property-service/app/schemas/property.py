@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 class PropertyBase(BaseModel):
@@ -42,3 +42,46 @@ class UnitRead(UnitBase):
 
 class PropertyWithUnits(PropertyRead):
     units: List[UnitRead] = []
+
+
+class UnitSearchItem(UnitRead):
+    property_name: str
+    property_type: str
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class RentBucketCount(BaseModel):
+    min_rent: float
+    max_rent: float
+    count: int
+
+
+class UnitSearchFacets(BaseModel):
+    property_type: List[FacetCount] = []
+    rent_bucket: List[RentBucketCount] = []
+    # True — подходящих помещений больше UNIT_SEARCH_FACET_LIMIT, счётчики неполные
+    truncated: bool = False
+
+
+class UnitSearchPage(BaseModel):
+    items: List[UnitSearchItem] = []
+    next_cursor: Optional[str] = None
+    facets: Optional[UnitSearchFacets] = None
+
+
+class PropertyDashboardItem(PropertyRead):
+    units_total: int = 0
+    units_by_status: Dict[str, int] = {}
+    unit_ids: List[int] = []
+
+
+class OwnerDashboard(BaseModel):
+    properties: List[PropertyDashboardItem] = []
+    units_total: int = 0
+    units_by_status: Dict[str, int] = {}
+    # подписанный список помещений для POST /api/v1/leases/summary
+    units_token: str
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест стенда docker-compose по сценариям из
+rental-system.postman_collection.json.
+
+Виртуальные пользователи трёх типов работают параллельно:
+- anon   — каталог фронтенда, публичные списки, поиск и подсказки;
+- owner  — регистрация/вход, создание объекта и помещений, списки, сводка;
+- tenant — регистрация/вход, поиск свободного помещения, договор, платёж, списки.
+
+По каждому эндпоинту (метод + шаблон пути) считаются rps, p50/p95/p99 и коды
+ответов; результат пишется в JSON с отсортированными ключами, чтобы прогоны
+разных коммитов можно было сравнивать (--compare или обычный diff).
+
+Пример:
+    python scripts/loadtest.py --users 50 --duration 60 --mix anon=0.7,owner=0.1,tenant=0.2 \\
+        --out results/loadtest.json --compare results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import httpx
+
+NAME_PREFIXES = ["бц", "офис", "склад", "дом", "тц", "лофт", "центр"]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    def add(self, label: str, seconds: float, status) -> None:
+        if not self.recording:
+            return
+        self.latencies[label].append(seconds)
+        self.statuses[label][str(status)] += 1
+
+    def add_error(self, label: str, exc: Exception) -> None:
+        if self.recording:
+            self.errors[label] += 1
+            self.statuses[label][type(exc).__name__] += 1
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    # nearest-rank
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class VirtualUser:
+    def __init__(self, kind, index, args, client, stats, rng, run_id):
+        self.kind = kind
+        self.index = index
+        self.args = args
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.run_id = run_id
+        self.headers = {}
+
+    async def call(self, label, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError as exc:
+            self.stats.add_error(label, exc)
+            return None
+        self.stats.add(label, time.perf_counter() - started, resp.status_code)
+        return resp
+
+    async def think(self):
+        if self.args.think_ms > 0:
+            await asyncio.sleep(self.rng.expovariate(1000 / self.args.think_ms))
+
+    async def login(self):
+        email = f"lt-{self.run_id}-{self.kind}-{self.index}@example.com"
+        password = "loadtest123"
+        await self.call(
+            "POST /api/v1/auth/register", "POST", f"{self.args.auth_base}/api/v1/auth/register",
+            json={"email": email, "username": f"{self.kind}{self.index}", "password": password},
+        )
+        resp = await self.call(
+            "POST /api/v1/auth/login", "POST", f"{self.args.auth_base}/api/v1/auth/login",
+            json={"email": email, "password": password},
+        )
+        if resp is None or resp.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        return True
+
+    # --- сценарии ---
+
+    async def anon_iteration(self):
+        a = self.args
+        prefix = self.rng.choice(NAME_PREFIXES)
+        await self.call("GET /catalog", "GET", f"{a.frontend_base}/catalog", params={"name": prefix})
+        await self.think()
+        resp = await self.call(
+            "GET /api/v1/properties/public", "GET", f"{a.property_base}/api/v1/properties/public",
+            params={"limit": 50},
+        )
+        if resp is not None and resp.status_code == 200 and resp.json():
+            prop = self.rng.choice(resp.json())
+            await self.think()
+            await self.call("GET /catalog/{property_id}", "GET", f"{a.frontend_base}/catalog/{prop['id']}")
+        await self.call(
+            "GET /catalog/suggest", "GET", f"{a.frontend_base}/catalog/suggest",
+            params={"q": prefix[:2], "field": "name"},
+        )
+        await self.call(
+            "GET /api/v1/units/search", "GET", f"{a.property_base}/api/v1/units/search",
+            params={"status": "AVAILABLE", "max_rent": self.rng.choice([30000, 60000, 100000])},
+        )
+
+    async def owner_iteration(self):
+        a = self.args
+        resp = await self.call(
+            "POST /api/v1/properties/", "POST", f"{a.property_base}/api/v1/properties/",
+            json={
+                "name": f"{self.rng.choice(NAME_PREFIXES).upper()} {self.rng.randint(1, 999)}",
+                "address": f"г. Москва, ул. Нагрузочная, {self.rng.randint(1, 200)}",
+                "description": "Создано нагрузочным тестом",
+                "property_type": self.rng.choice(["OFFICE", "APARTMENT", "WAREHOUSE"]),
+            },
+        )
+        if resp is None or resp.status_code != 201:
+            return
+        property_id = resp.json()["id"]
+        for number in range(1, self.rng.randint(2, 5)):
+            await self.think()
+            await self.call(
+                "POST /api/v1/units/", "POST", f"{a.property_base}/api/v1/units/",
+                json={
+                    "property_id": property_id,
+                    "unit_number": str(100 + number),
+                    "area": round(self.rng.uniform(20, 300), 1),
+                    "floor": self.rng.randint(1, 20),
+                    "status": "AVAILABLE",
+                    "monthly_rent": self.rng.randrange(20000, 200000, 1000),
+                },
+            )
+        await self.think()
+        await self.call("GET /api/v1/properties/", "GET", f"{a.property_base}/api/v1/properties/")
+        await self.call(
+            "GET /api/v1/units/", "GET", f"{a.property_base}/api/v1/units/",
+            params={"property_id": property_id},
+        )
+        await self.call("GET /api/v1/properties/dashboard", "GET", f"{a.property_base}/api/v1/properties/dashboard")
+
+    async def tenant_iteration(self):
+        a = self.args
+        resp = await self.call(
+            "GET /api/v1/units/search", "GET", f"{a.property_base}/api/v1/units/search",
+            params={"status": "AVAILABLE", "limit": 50},
+        )
+        if resp is None or resp.status_code != 200 or not resp.json()["items"]:
+            return
+        unit = self.rng.choice(resp.json()["items"])
+        await self.think()
+        start = date.today() + timedelta(days=self.rng.randint(0, 60))
+        resp = await self.call(
+            "POST /api/v1/leases/", "POST", f"{a.leasing_base}/api/v1/leases/",
+            json={
+                "unit_id": unit["id"],
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=365)).isoformat(),
+                "monthly_rent": unit["monthly_rent"],
+                "status": "ACTIVE",
+            },
+        )
+        # 400 — помещение уже занято другим арендатором, это нормальный исход
+        if resp is None or resp.status_code != 201:
+            return
+        lease_id = resp.json()["id"]
+        await self.think()
+        await self.call(
+            "POST /api/v1/payments/", "POST", f"{a.leasing_base}/api/v1/payments/",
+            json={
+                "lease_id": lease_id,
+                "payment_date": start.isoformat(),
+                "amount": unit["monthly_rent"],
+                "status": "PAID",
+                "method": self.rng.choice(["card", "bank_transfer", "cash"]),
+            },
+        )
+        await self.think()
+        await self.call("GET /api/v1/leases/", "GET", f"{a.leasing_base}/api/v1/leases/")
+        await self.call(
+            "GET /api/v1/payments/", "GET", f"{a.leasing_base}/api/v1/payments/",
+            params={"lease_id": lease_id},
+        )
+
+    async def run(self, deadline):
+        if self.kind != "anon" and not await self.login():
+            return
+        iteration = getattr(self, f"{self.kind}_iteration")
+        while time.monotonic() < deadline:
+            await iteration()
+            await self.think()
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        kind, weight = part.split("=")
+        if kind not in ("anon", "owner", "tenant"):
+            raise argparse.ArgumentTypeError(f"неизвестный тип пользователя: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def summarize(stats, elapsed):
+    endpoints = {}
+    total = 0
+    for label in sorted(stats.latencies.keys() | stats.errors.keys()):
+        ordered = sorted(stats.latencies.get(label, []))
+        count = len(ordered) + stats.errors.get(label, 0)
+        total += count
+        endpoints[label] = {
+            "count": count,
+            "rps": round(count / elapsed, 2),
+            "p50_ms": _ms(percentile(ordered, 0.50)),
+            "p95_ms": _ms(percentile(ordered, 0.95)),
+            "p99_ms": _ms(percentile(ordered, 0.99)),
+            "max_ms": _ms(ordered[-1] if ordered else None),
+            "errors": stats.errors.get(label, 0),
+            "status": dict(sorted(stats.statuses[label].items())),
+        }
+    return endpoints, round(total / elapsed, 2)
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["endpoints"]
+    print(f"\n{'endpoint':45} {'p95 base':>10} {'p95 now':>10} {'change':>8}")
+    for label, now in current.items():
+        base = baseline.get(label)
+        if not base or not base["p95_ms"] or now["p95_ms"] is None:
+            continue
+        change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        print(f"{label:45} {base['p95_ms']:>10} {now['p95_ms']:>10} {change:>+7.1f}%")
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    run_id = f"{int(time.time())}-{rng.randrange(10**6)}"
+    kinds = list(args.mix)
+    weights = [args.mix[k] for k in kinds]
+    stats = Stats()
+
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        users = [
+            VirtualUser(rng.choices(kinds, weights)[0], i, args, client, stats, random.Random(rng.random()), run_id)
+            for i in range(args.users)
+        ]
+        started = time.monotonic()
+        deadline = started + args.warmup + args.duration
+        tasks = [asyncio.create_task(user.run(deadline)) for user in users]
+        await asyncio.sleep(args.warmup)
+        stats.recording = True
+        measured_from = time.monotonic()
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - measured_from
+
+    endpoints, rps = summarize(stats, elapsed)
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "users": args.users,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "think_ms": args.think_ms,
+            "mix": args.mix,
+            "seed": args.seed,
+            "users_by_kind": {k: sum(1 for u in users if u.kind == k) for k in kinds},
+        },
+        "total_rps": rps,
+        "endpoints": endpoints,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    print(f"{'endpoint':45} {'count':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}")
+    for label, e in endpoints.items():
+        print(
+            f"{label:45} {e['count']:>7} {e['rps']:>8} {e['p50_ms'] or '-':>8} "
+            f"{e['p95_ms'] or '-':>8} {e['p99_ms'] or '-':>8} {e['errors']:>5}"
+        )
+    print(f"total rps: {rps}; результат: {args.out}")
+    if args.compare:
+        compare(endpoints, args.compare)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест стенда rental-system")
+    parser.add_argument("--frontend-base", default="http://localhost:8000")
+    parser.add_argument("--auth-base", default="http://localhost:8001")
+    parser.add_argument("--property-base", default="http://localhost:8002")
+    parser.add_argument("--leasing-base", default="http://localhost:8003")
+    parser.add_argument("--users", type=int, default=20, help="число виртуальных пользователей")
+    parser.add_argument("--duration", type=float, default=30, help="длительность замера, с")
+    parser.add_argument("--warmup", type=float, default=5, help="прогрев без учёта в статистике, с")
+    parser.add_argument("--think-ms", type=float, default=200, help="средняя пауза между шагами, мс")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("anon=0.7,owner=0.1,tenant=0.2"))
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="loadtest-results.json")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения p95")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 # PowerShell скрипт для выполнения SQL миграций в Docker контейнере
+# Использование: .\scripts\migrate.ps1 [файл миграции]
 
-Write-Host "Выполнение миграции базы данных..." -ForegroundColor Cyan
+param(
+    [string]$MigrationFile = "db/migration_owner_to_user.sql"
+)
 
-Get-Content db/migration_owner_to_user.sql | docker-compose exec -T db psql -U rental_user -d rental_db
+Write-Host "Выполнение миграции базы данных: $MigrationFile..." -ForegroundColor Cyan
+
+Get-Content $MigrationFile | docker-compose exec -T db psql -v ON_ERROR_STOP=1 -U rental_user -d rental_db
 
 if ($LASTEXITCODE -eq 0) {
     Write-Host "✅ Миграция успешно выполнена!" -ForegroundColor Green
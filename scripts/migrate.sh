@@ -1,9 +1,12 @@
 #!/bin/bash
 # Скрипт для выполнения SQL миграций в Docker контейнере
+# Использование: ./scripts/migrate.sh [файл миграции]
 
-echo "Выполнение миграции базы данных..."
+MIGRATION_FILE="${1:-db/migration_owner_to_user.sql}"
 
-docker-compose exec -T db psql -U rental_user -d rental_db < db/migration_owner_to_user.sql
+echo "Выполнение миграции базы данных: $MIGRATION_FILE..."
+
+docker-compose exec -T db psql -v ON_ERROR_STOP=1 -U rental_user -d rental_db < "$MIGRATION_FILE"
 
 if [ $? -eq 0 ]; then
     echo "✅ Миграция успешно выполнена!"
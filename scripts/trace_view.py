@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Просмотр трасс из JSONL-файлов (TRACE_FILE сервисов).
+
+Использование:
+    python scripts/trace_view.py traces/*.jsonl                 # самые долгие трассы
+    python scripts/trace_view.py traces/*.jsonl --trace <id>    # дерево одной трассы
+    python scripts/trace_view.py traces/*.jsonl --top 20 --min-ms 100
+"""
+import argparse
+import json
+from collections import defaultdict
+
+
+def load_spans(paths):
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    spans.append(json.loads(line))
+    return spans
+
+
+def roots_of(spans):
+    ids = {span["span_id"] for span in spans}
+    return [span for span in spans if span["parent_id"] not in ids]
+
+
+def print_tree(spans):
+    children = defaultdict(list)
+    for span in spans:
+        children[span["parent_id"]].append(span)
+    trace_start = min(span["start"] for span in spans)
+
+    def walk(span, depth):
+        offset = (span["start"] - trace_start) * 1000
+        label = span["name"]
+        if span["kind"] == "client" and "db.statement" in span["attributes"]:
+            label = "SQL " + " ".join(span["attributes"]["db.statement"].split())[:80]
+        status = span["attributes"].get("http.status_code", "")
+        error = f"  ERROR {span['error']}" if span.get("error") else ""
+        print(
+            f"{offset:9.1f} ms {span['duration_ms']:9.1f} ms  "
+            f"{'  ' * depth}[{span['service']}] {label} {status}{error}"
+        )
+        for child in sorted(children[span["span_id"]], key=lambda s: s["start"]):
+            walk(child, depth + 1)
+
+    for root in sorted(roots_of(spans), key=lambda s: s["start"]):
+        walk(root, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Просмотр трасс из JSONL")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--trace", help="id трассы для вывода дерева span'ов")
+    parser.add_argument("--top", type=int, default=10, help="сколько самых долгих трасс показать")
+    parser.add_argument("--min-ms", type=float, default=0, help="не показывать трассы быстрее")
+    args = parser.parse_args()
+
+    by_trace = defaultdict(list)
+    for span in load_spans(args.files):
+        by_trace[span["trace_id"]].append(span)
+
+    if args.trace:
+        if args.trace not in by_trace:
+            parser.error(f"трасса {args.trace} не найдена")
+        print_tree(by_trace[args.trace])
+        return
+
+    summaries = []
+    for trace_id, spans in by_trace.items():
+        roots = roots_of(spans)
+        root = max(roots, key=lambda s: s["duration_ms"])
+        sql = sum(1 for s in spans if "db.statement" in s["attributes"])
+        summaries.append((root["duration_ms"], trace_id, root, len(spans), sql))
+
+    summaries.sort(key=lambda item: item[0], reverse=True)
+    for duration, trace_id, root, count, sql in summaries[: args.top]:
+        if duration < args.min_ms:
+            break
+        print(f"{trace_id}  {duration:9.1f} ms  spans={count:<4} sql={sql:<4} [{root['service']}] {root['name']}")
+
+
+if __name__ == "__main__":
+    main()